@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# PeTTraC Animation Engine
+# Time-based tweens and transitions between screen snapshots
+
+import time
+import logging
+import numpy as np
+from typing import Callable, List, Optional, Tuple
+from PIL import Image
+
+from rgb565_canvas import unpack_rgb565
+
+Box = Tuple[int, int, int, int]
+
+# Easing functions map linear progress (0.0 - 1.0) to eased progress
+def linear(t: float) -> float:
+    """Constant speed"""
+    return t
+
+def ease_out_cubic(t: float) -> float:
+    """Fast start, slowing to a stop"""
+    return 1 - (1 - t) ** 3
+
+def ease_in_out_cubic(t: float) -> float:
+    """Slow start and end"""
+    if t < 0.5:
+        return 4 * t ** 3
+    return 1 - (-2 * t + 2) ** 3 / 2
+
+class Tween:
+    """Moves a value from start to end over a fixed time
+
+    Progress comes from the monotonic clock rather than the number of
+    frames drawn, so a slow frame makes the next one jump ahead instead of
+    stretching the animation.
+    """
+
+    def __init__(self, start: float, end: float, duration: float,
+                 on_update: Callable[[float], None],
+                 easing: Callable[[float], float] = ease_out_cubic,
+                 on_complete: Optional[Callable[[], None]] = None):
+        self.start = start
+        self.end = end
+        self.duration = duration
+        self.on_update = on_update
+        self.easing = easing
+        self.on_complete = on_complete
+        self.start_time = None
+        self.finished = False
+
+    def progress(self, now: float) -> float:
+        """Get the linear progress at a point in time"""
+        if self.start_time is None:
+            self.start_time = now
+        if self.duration <= 0:
+            return 1.0
+        return min(1.0, (now - self.start_time) / self.duration)
+
+    def step(self, now: float):
+        """Apply the value for a point in time"""
+        t = self.progress(now)
+        self.on_update(self.start + (self.end - self.start) * self.easing(t))
+        if t >= 1.0:
+            self.finished = True
+            if self.on_complete:
+                self.on_complete()
+
+class Animator:
+    """Runs all active tweens once per frame
+
+    Frames that start later than the frame budget allows are counted as
+    skipped; the tweens simply continue from the current time.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        """Get singleton instance"""
+        if cls._instance is None:
+            cls._instance = Animator()
+        return cls._instance
+
+    def __init__(self, frame_budget: float = 0.05):
+        self.frame_budget = frame_budget
+        self.tweens: List[Tween] = []
+        self.last_frame_time = None
+        self.frames_skipped = 0
+
+    def add(self, tween: Tween) -> Tween:
+        """Start a tween"""
+        self.tweens.append(tween)
+        return tween
+
+    def cancel(self, tween: Tween):
+        """Stop a tween where it is"""
+        if tween in self.tweens:
+            self.tweens.remove(tween)
+
+    def is_active(self) -> bool:
+        """Check whether any tween is running"""
+        return bool(self.tweens)
+
+    def update(self, now: Optional[float] = None):
+        """Advance every tween to the current time"""
+        if not self.tweens:
+            self.last_frame_time = None
+            return
+
+        if now is None:
+            now = time.monotonic()
+
+        # Whole frame budgets that passed without a frame were dropped
+        if self.last_frame_time is not None:
+            missed = int((now - self.last_frame_time) / self.frame_budget) - 1
+            if missed > 0:
+                self.frames_skipped += missed
+        self.last_frame_time = now
+
+        for tween in list(self.tweens):
+            try:
+                tween.step(now)
+            except Exception as e:
+                logging.error(f"Error in animation: {e}")
+                tween.finished = True
+            if tween.finished and tween in self.tweens:
+                self.tweens.remove(tween)
+
+# Convenience function to get the animator
+def get_animator() -> Animator:
+    """Get the animator that runs every tween in the app"""
+    return Animator.get_instance()
+
+class Transition:
+    """Animates from a snapshot of one screen to a snapshot of another
+
+    The transition draws straight into the screen image and reports the
+    boxes it changed, so only the moving part of the frame is sent to the
+    display.
+    """
+
+    def __init__(self, target: Image.Image, outgoing: Image.Image, incoming: Image.Image):
+        self.target = target
+        self.outgoing = outgoing
+        self.incoming = incoming
+        self.width, self.height = target.size
+        self.position = 0.0  # eased progress set by the tween
+        self.drawn_position = 0.0
+        self.finished = False
+
+    def set_position(self, position: float):
+        """Tween callback"""
+        self.position = position
+
+    def finish(self):
+        """Tween completion callback"""
+        self.position = 1.0
+        self.finished = True
+
+    def render(self) -> List[Box]:
+        """Draw the frame for the current position and return the damage"""
+        if self.position == self.drawn_position:
+            return []
+        damage = self.draw(self.drawn_position, self.position)
+        self.drawn_position = self.position
+        return damage
+
+    def draw(self, previous: float, position: float) -> List[Box]:
+        """Draw one frame (override in subclasses)"""
+        self.target.paste(self.incoming)
+        return [(0, 0, self.width, self.height)]
+
+class SlideTransition(Transition):
+    """The incoming screen slides over the outgoing one
+
+    Only the incoming part moves, so the damage is the strip it covers.
+    direction "left" slides in from the right edge, "right" from the left.
+    """
+
+    def __init__(self, target, outgoing, incoming, direction: str = "left"):
+        super().__init__(target, outgoing, incoming)
+        self.direction = direction
+
+    def draw(self, previous: float, position: float) -> List[Box]:
+        covered = round(self.width * position)
+        if covered <= 0:
+            return []
+
+        if self.direction == "left":
+            x = self.width - covered
+            self.target.paste(self.incoming.crop((0, 0, covered, self.height)), (x, 0))
+            return [(x, 0, self.width, self.height)]
+
+        self.target.paste(self.incoming.crop((self.width - covered, 0, self.width, self.height)), (0, 0))
+        return [(0, 0, covered, self.height)]
+
+class FadeTransition(Transition):
+    """Cross-fades between the two screens with NumPy"""
+
+    def __init__(self, target, outgoing, incoming):
+        super().__init__(target, outgoing, incoming)
+        self._from = self._rgb(outgoing).astype(np.uint16)
+        self._to = self._rgb(incoming).astype(np.uint16)
+        self._frame = np.empty_like(self._from)
+
+    @staticmethod
+    def _rgb(image):
+        """Get the pixels of an RGB or RGB565 image as RGB"""
+        pixels = np.asarray(image)
+        return unpack_rgb565(pixels) if pixels.ndim == 2 else pixels
+
+    def draw(self, previous: float, position: float) -> List[Box]:
+        alpha = round(position * 255)
+        np.multiply(self._from, 255 - alpha, out=self._frame)
+        self._frame += self._to * alpha
+        self._frame += 127
+        self._frame //= 255
+        self.target.paste(Image.fromarray(self._frame.astype(np.uint8), "RGB"))
+        return [(0, 0, self.width, self.height)]
@@ -14,8 +14,12 @@ from event_system import get_event_bus, Event, EventTypes
 from state_manager import get_app_state
 from hardware_abstraction import get_hardware_manager
 from ui_framework import Screen, Rect
-from screens import get_screen
+from compositor import Compositor, Layer
+from rgb565_canvas import RGB565Image, RGB565Draw
+from animation import get_animator, Tween, SlideTransition, FadeTransition
+from screen_manager import ScreenManager
 from config import get_config
+from frame_governor import FrameRateGovernor
 import fonts
 
 # Configure logging
@@ -27,7 +31,10 @@ logging.basicConfig(level=numeric_level, format='%(asctime)s - %(levelname)s - %
 # Constants
 DISPLAY_WIDTH = 240
 DISPLAY_HEIGHT = 240
-UPDATE_INTERVAL = 0.05  # 50ms refresh rate (20fps)
+UPDATE_INTERVAL = 0.05  # 50ms refresh rate (20fps) while active
+TOAST_HEIGHT = 40
+TOAST_Y = (DISPLAY_HEIGHT - TOAST_HEIGHT) // 2
+HUD_BOX = (DISPLAY_WIDTH - 60, 0, DISPLAY_WIDTH, 16)
 
 class PeTTraCApplication:
     """Main application class"""
@@ -50,12 +57,48 @@ class PeTTraCApplication:
         self.app_state.debug_mode.value = self.debug_mode
         
         # Create render surface
-        self.image = Image.new("RGB", (DISPLAY_WIDTH, DISPLAY_HEIGHT), "BLACK")
-        self.canvas = ImageDraw.Draw(self.image)
+        if config.get("display", "canvas") == "rgb565":
+            # Draw straight into the panel's pixel format
+            self.image = RGB565Image((DISPLAY_WIDTH, DISPLAY_HEIGHT), "BLACK")
+            self.canvas = RGB565Draw(self.image)
+        else:
+            self.image = Image.new("RGB", (DISPLAY_WIDTH, DISPLAY_HEIGHT), "BLACK")
+            self.canvas = ImageDraw.Draw(self.image)
         
-        # Set up screens
-        self.screens: Dict[str, Screen] = {}
+        # The canvas is kept between frames and only damaged areas are
+        # repainted; these force a full repaint
+        self.full_redraw = True
+        self.rendered_theme = None
+        
+        # Overlays are drawn on their own layers above the screen
+        self.compositor = Compositor(self.image)
+        self.toast_layer = self.compositor.add_layer(Layer(
+            "toast", (0, TOAST_Y, DISPLAY_WIDTH, TOAST_Y + TOAST_HEIGHT + 1),
+            z=10, render=self._render_toast
+        ))
+        self.hud_layer = self.compositor.add_layer(Layer(
+            "debug_hud", HUD_BOX, z=20, render=self._render_hud
+        ))
+        self.toast_drawn = None  # toast message on the toast layer
+        
+        # Animations advance with the clock, one step per rendered frame
+        max_fps = config.get("display", "max_fps") or 1.0 / UPDATE_INTERVAL
+        self.animator = get_animator()
+        self.animator.frame_budget = 1.0 / max_fps
+        self.transition = None
+        self.transition_tween = None
+        self.transition_style = config.get("display", "transition") or "none"
+        self.transition_duration = config.get("display", "transition_duration") or 0.25
+        
+        # Set up screens; a bounded number stay built and likely next
+        # screens are built while the loop is idle
+        self.screen_manager = ScreenManager(
+            max_screens=config.get("display", "screen_cache_size") or 4,
+            preload=config.get("display", "preload_screens") is not False
+        )
         self.current_screen: Optional[Screen] = None
+        self.current_screen_name = None
+        self.screen_stack = []  # names of screens navigated through, for back transitions
         self.load_screen(config.get("system", "default_screen") or "desktop")
         
         # Application state
@@ -63,6 +106,14 @@ class PeTTraCApplication:
         self.last_update_time = time.time()
         self.frame_count = 0
         self.fps = 0
+        self.hud_fps = None  # FPS shown on the debug HUD
+        
+        # Frame rate drops while nothing is changing
+        self.governor = FrameRateGovernor(
+            full_fps=max_fps,
+            idle_fps=config.get("display", "idle_fps") or 1.0,
+            input_hold=config.get("display", "input_hold") or 2.0
+        )
         
         # Subscribe to events
         self.event_bus.subscribe(EventTypes.SCREEN_CHANGE, self._on_screen_change)
@@ -71,42 +122,99 @@ class PeTTraCApplication:
     
     def load_screen(self, screen_name: str):
         """Load and activate a screen by name"""
-        # Deactivate current screen if any
-        if self.current_screen:
-            self.current_screen.deactivate()
+        previous_screen = self.current_screen
         
-        # Create screen if not already cached
-        if screen_name not in self.screens:
-            self.screens[screen_name] = get_screen(screen_name)
+        # Deactivate the current screen and activate the new one, building
+        # it if it is not cached
+        self.current_screen = self.screen_manager.show(screen_name)
+        self.current_screen_name = screen_name
         
-        # Set current screen
-        self.current_screen = self.screens[screen_name]
+        # Returning to a screen further up the stack is a back navigation
+        back = screen_name in self.screen_stack
+        if back:
+            del self.screen_stack[self.screen_stack.index(screen_name) + 1:]
+        else:
+            self.screen_stack.append(screen_name)
         
-        # Activate the screen
-        self.current_screen.activate()
+        if previous_screen and self.transition_style != "none":
+            self._start_transition(back)
+        else:
+            self.full_redraw = True
         
         logging.info(f"Loaded screen: {screen_name}")
     
+    def _start_transition(self, back: bool):
+        """Animate from what is on screen now to the newly loaded screen"""
+        # A transition still running is replaced from where it got to
+        if self.transition_tween:
+            self.animator.cancel(self.transition_tween)
+        
+        # Snapshot both screens; the incoming one is drawn in full so the
+        # screen's retained state matches the last transition frame
+        outgoing = self.image.copy()
+        self.current_screen.render(self.canvas, True)
+        self.rendered_theme = self.current_screen.theme_manager.get_current_theme()
+        incoming = self.image.copy()
+        self.image.paste(outgoing)
+        
+        if self.transition_style == "fade":
+            self.transition = FadeTransition(self.image, outgoing, incoming)
+        else:
+            direction = "right" if back else "left"
+            self.transition = SlideTransition(self.image, outgoing, incoming, direction)
+        
+        self.transition_tween = self.animator.add(Tween(
+            0.0, 1.0, self.transition_duration,
+            self.transition.set_position,
+            on_complete=self.transition.finish
+        ))
+    
     def _on_screen_change(self, event: Event):
         """Handle screen change events"""
         new_screen = event.data.get("screen")
-        if new_screen and new_screen != self.app_state.current_screen.value:
+        if new_screen and new_screen != self.current_screen_name:
             self.load_screen(new_screen)
     
     def render(self):
         """Render the current screen to the display"""
-        # Clear the canvas
-        self.canvas.rectangle((0, 0, DISPLAY_WIDTH, DISPLAY_HEIGHT), fill="BLACK")
+        # Nothing to draw for while the display sleeps
+        if self.app_state.display_asleep.value:
+            return
         
-        # Render current screen
-        if self.current_screen:
-            self.current_screen.draw(self.canvas)
+        scroll = None
+        if self.transition:
+            # The screen is frozen while a transition draws over it; changes
+            # made meanwhile are still marked dirty and drawn afterwards
+            damage = self.transition.render()
+            if self.transition.finished:
+                self.transition = None
+                self.transition_tween = None
+        else:
+            # Colours are resolved at draw time, so a theme switch repaints everything
+            theme = self.current_screen.theme_manager.get_current_theme() if self.current_screen else None
+            full = self.full_redraw or theme != self.rendered_theme
+            
+            # Render current screen, repainting only what changed
+            if self.current_screen:
+                damage = self.current_screen.render(self.canvas, full)
+                
+                # The display can scroll one area itself
+                if self.current_screen.scrolled:
+                    scroll = self.current_screen.scrolled[0]
+                    self.current_screen.scrolled = []
+            else:
+                self.canvas.rectangle((0, 0, DISPLAY_WIDTH, DISPLAY_HEIGHT), fill="BLACK")
+                damage = None
+            
+            self.full_redraw = False
+            self.rendered_theme = theme
         
-        # Render toast message if any
-        self._render_toast()
+        # Update overlays and blend them over the screen
+        self._update_overlays()
+        damage = self.compositor.composite(damage)
         
-        # Send to hardware
-        self.hardware.render_to_display(self.image)
+        # Send to hardware; damage is None for a full frame
+        self.hardware.render_to_display(self.compositor.output, damage, scroll)
         
         # Update frame stats
         self.frame_count += 1
@@ -119,34 +227,42 @@ class PeTTraCApplication:
             self.frame_count = 0
             self.last_update_time = current_time
     
-    def _render_toast(self):
-        """Render toast message if active"""
-        if not self.app_state.is_toast_visible():
-            return
-            
-        message, duration, start_time = self.app_state.toast_message.value
+    def _update_overlays(self):
+        """Show, hide and invalidate overlay layers to match the app state"""
+        toast_visible = self.app_state.is_toast_visible()
+        if toast_visible and self.app_state.toast_message.value != self.toast_drawn:
+            self.toast_drawn = self.app_state.toast_message.value
+            self.toast_layer.invalidate()
+        self.toast_layer.set_visible(toast_visible)
         
-        # Create a toast message
-        toast_height = 40
-        toast_y = (DISPLAY_HEIGHT - toast_height) // 2
+        # The HUD only changes when the FPS figure does
+        self.hud_layer.set_visible(self.app_state.debug_mode.value)
+        if round(self.fps) != self.hud_fps:
+            self.hud_fps = round(self.fps)
+            self.hud_layer.invalidate()
+    
+    def _render_toast(self, canvas):
+        """Render the toast message onto its layer"""
+        message, duration, start_time = self.app_state.toast_message.value
         
         # Draw toast background
-        self.canvas.rectangle(
-            (10, toast_y, DISPLAY_WIDTH - 10, toast_y + toast_height), 
+        canvas.rectangle(
+            (10, 0, DISPLAY_WIDTH - 10, TOAST_HEIGHT), 
             fill="BLUE", 
             outline="CYAN"
         )
         
         # Draw toast text
         font = fonts.get_font("bold", "medium")
-        text_width = font.getlength(message)
-        text_x = (DISPLAY_WIDTH - text_width) // 2
-        self.canvas.text(
-            (text_x, toast_y + 10), 
-            message, 
-            fill="WHITE", 
-            font=font
-        )
+        text_x = (DISPLAY_WIDTH - fonts.get_atlas(font).get_length(message)) // 2
+        fonts.draw_text(canvas, (text_x, 10), message, font, "WHITE")
+    
+    def _render_hud(self, canvas):
+        """Render the debug HUD onto its layer"""
+        width = HUD_BOX[2] - HUD_BOX[0]
+        height = HUD_BOX[3] - HUD_BOX[1]
+        canvas.rectangle((0, 0, width, height), fill=(0, 0, 0, 160))
+        fonts.draw_text(canvas, (4, 1), f"{self.hud_fps} FPS", fonts.get_font("mono", "small"), "YELLOW")
     
     def update(self):
         """Update application state"""
@@ -159,6 +275,14 @@ class PeTTraCApplication:
         # Update current screen
         if self.current_screen:
             self.current_screen.update()
+        
+        # Advance animations to the current time
+        self.animator.update()
+        
+        # A visible toast has to be hidden on time, and animations need
+        # every frame they can get
+        if self.app_state.is_toast_visible() or self.animator.is_active():
+            self.governor.keep_active(UPDATE_INTERVAL)
     
     def run(self):
         """Main application loop"""
@@ -176,11 +300,16 @@ class PeTTraCApplication:
                 # Render
                 self.render()
                 
-                # Calculate sleep time to maintain consistent frame rate
+                # Use idle time to build a screen the user may open next
+                if not self.governor.is_active() and not self.animator.is_active():
+                    self.screen_manager.preload_next()
+                
+                # Calculate sleep time to maintain the governed frame rate;
+                # a button press ends the sleep early
                 elapsed = time.time() - loop_start
-                sleep_time = max(0, UPDATE_INTERVAL - elapsed)
+                sleep_time = max(0, self.governor.next_interval(loop_start) - elapsed)
                 if sleep_time > 0:
-                    time.sleep(sleep_time)
+                    self.hardware.wait_for_input(sleep_time)
         
         except KeyboardInterrupt:
             logging.info("Application interrupted by user")
@@ -194,6 +323,9 @@ class PeTTraCApplication:
         logging.info("Shutting down PeTTraC application")
         self.running = False
         
+        # Release screens
+        self.screen_manager.clear()
+        
         # Clean up hardware
         self.hardware.shutdown()
         
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# PeTTraC Display Conversion Benchmark
+# Compares the old list-based RGB565 conversion with the preallocated NumPy path
+# and the packed RGB444 format
+#
+# Usage: python3 benchmark_display.py [frames]
+# Runs without display hardware; SPI writes are replaced by a byte counter.
+
+import sys
+import time
+import tracemalloc
+import numpy as np
+from PIL import Image
+
+from pixel_format import RGB565Converter, RGB444Converter
+
+WIDTH = 240
+HEIGHT = 240
+
+class NullSPI:
+    """Stand-in for spidev that only counts calls and bytes"""
+
+    def __init__(self):
+        self.calls = 0
+        self.bytes = 0
+
+    def writebytes(self, data):
+        self.calls += 1
+        self.bytes += len(data)
+
+    def writebytes2(self, data):
+        self.calls += 1
+        self.bytes += memoryview(data).nbytes
+
+def legacy_frame(image, spi):
+    """Conversion and transfer as done before the preallocated buffers"""
+    img = np.asarray(image)
+    pix = np.zeros((WIDTH, HEIGHT, 2), dtype=np.uint8)
+    pix[...,[0]] = np.add(np.bitwise_and(img[...,[0]], 0xF8),
+                          np.right_shift(img[...,[1]], 5))
+    pix[...,[1]] = np.add(np.bitwise_and(np.left_shift(img[...,[1]], 3), 0xE0),
+                          np.right_shift(img[...,[2]], 3))
+    pix = pix.flatten().tolist()
+    for i in range(0, len(pix), 4096):
+        spi.writebytes(pix[i:i+4096])
+
+def converter_frame(image, spi, converter):
+    """Conversion and transfer through RGB565Converter"""
+    img = np.asarray(image)
+    converter.convert(img)
+    spi.writebytes2(converter.window((0, 0, WIDTH, HEIGHT)).view(np.uint8))
+
+def rgb444_frame(image, spi, converter):
+    """Conversion and transfer through RGB444Converter"""
+    img = np.asarray(image)
+    converter.convert(img)
+    spi.writebytes2(converter.window((0, 0, WIDTH, HEIGHT)))
+
+def count_allocations(frame_func):
+    """Count the memory blocks a frame has allocated at its busiest point
+
+    A snapshot is taken whenever a function called during the frame
+    returns, while its temporaries and its result are still alive, so
+    short-lived buffers are counted too.
+    """
+    peak = 0
+
+    def allocated_blocks():
+        return sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+
+    def sample(frame, event, arg):
+        nonlocal peak
+        if event in ("return", "c_return"):
+            peak = max(peak, allocated_blocks() - baseline)
+
+    tracemalloc.start()
+    baseline = allocated_blocks()
+    sys.setprofile(sample)
+    try:
+        frame_func()
+    finally:
+        sys.setprofile(None)
+        tracemalloc.stop()
+    return peak
+
+def measure(name, frame_func, frames):
+    """Time a frame function and measure the memory it allocates per frame"""
+    # Warm up so one-time allocations are not counted
+    frame_func()
+
+    start = time.perf_counter()
+    for _ in range(frames):
+        frame_func()
+    elapsed = (time.perf_counter() - start) / frames
+
+    # tracemalloc sees both Python objects and NumPy data buffers, so the
+    # peak above the starting point is the temporary memory one frame needs
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    frame_func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    allocations = count_allocations(frame_func)
+
+    print(f"{name:<10} {elapsed * 1000:8.2f} ms/frame "
+          f"{(peak - baseline) / 1024:9.1f} KiB allocated "
+          f"{allocations:6d} allocations")
+    return elapsed
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    # Random content so no conversion path can take a shortcut
+    rng = np.random.default_rng(0)
+    image = Image.fromarray(rng.integers(0, 256, (HEIGHT, WIDTH, 3), dtype=np.uint8), "RGB")
+
+    # Both paths must produce identical bytes
+    legacy_spi, new_spi = NullSPI(), NullSPI()
+    converter = RGB565Converter(WIDTH, HEIGHT)
+    legacy_bytes = []
+    legacy_spi.writebytes = lambda data: legacy_bytes.extend(data)
+    legacy_frame(image, legacy_spi)
+    converter_frame(image, new_spi, converter)
+    if bytes(legacy_bytes) != converter.frame.tobytes():
+        print("Output mismatch between legacy and converter paths")
+        return 1
+
+    print(f"{frames} frames of {WIDTH}x{HEIGHT}")
+    legacy_spi, new_spi, rgb444_spi = NullSPI(), NullSPI(), NullSPI()
+    rgb444 = RGB444Converter(WIDTH, HEIGHT)
+    old = measure("legacy", lambda: legacy_frame(image, legacy_spi), frames)
+    new = measure("converter", lambda: converter_frame(image, new_spi, converter), frames)
+    measure("rgb444", lambda: rgb444_frame(image, rgb444_spi, rgb444), frames)
+    # measure runs each frame function frames + 3 times
+    runs = frames + 3
+    print(f"SPI calls per frame: legacy {legacy_spi.calls // runs}, "
+          f"converter {new_spi.calls // runs}")
+    print(f"SPI bytes per frame: rgb565 {new_spi.bytes // runs}, "
+          f"rgb444 {rgb444_spi.bytes // runs}")
+    print(f"Speedup: {old / new:.1f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
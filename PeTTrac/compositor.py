@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# PeTTraC Layer Compositor
+# Blends overlays such as toasts and the debug HUD over the screen
+
+import numpy as np
+from typing import Callable, List, Optional, Tuple
+from PIL import Image, ImageDraw
+
+from rgb565_canvas import unpack_rgb565
+
+Box = Tuple[int, int, int, int]
+
+def _intersect(a: Box, b: Box) -> Optional[Box]:
+    """Get the overlap of two boxes, or None if they don't overlap"""
+    box = (max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3]))
+    if box[0] < box[2] and box[1] < box[3]:
+        return box
+    return None
+
+class Layer:
+    """An RGBA plane drawn over the screen at a fixed position
+
+    The layer is only re-rendered after invalidate() is called; between
+    renders its pixels are kept, already split into premultiplied colour
+    and inverse alpha so blending is a multiply and an add per pixel.
+    """
+
+    def __init__(self, name: str, box: Box, z: int = 0,
+                 render: Optional[Callable[[ImageDraw.ImageDraw], None]] = None):
+        self.name = name
+        self.box = box
+        self.z = z
+        self.render_func = render  # draws the layer contents in local coordinates
+        self.visible = False
+        self.opacity = 1.0
+        self.compositor = None
+
+        width, height = box[2] - box[0], box[3] - box[1]
+        self.image = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+        self.canvas = ImageDraw.Draw(self.image)
+
+        self._dirty = True
+        self._premultiplied = np.zeros((height, width, 3), dtype=np.uint16)
+        self._inverse_alpha = np.full((height, width, 1), 255, dtype=np.uint16)
+
+    def invalidate(self):
+        """Render the layer again before the next composite"""
+        self._dirty = True
+        if self.visible:
+            self._damage()
+
+    def set_visible(self, visible: bool):
+        """Show or hide the layer"""
+        if visible != self.visible:
+            self.visible = visible
+            self._damage()
+
+    def set_opacity(self, opacity: float):
+        """Set how opaque the whole layer is, from 0.0 to 1.0"""
+        opacity = min(1.0, max(0.0, opacity))
+        if opacity != self.opacity:
+            self.opacity = opacity
+            self.invalidate()
+
+    def _damage(self):
+        """Have the compositor repaint the area under the layer"""
+        if self.compositor:
+            self.compositor.damage.append(self.box)
+
+    def render(self):
+        """Redraw the layer and refresh its blending planes"""
+        self.canvas.rectangle((0, 0, self.image.width, self.image.height), fill=(0, 0, 0, 0))
+        if self.render_func:
+            self.render_func(self.canvas)
+
+        pixels = np.asarray(self.image).astype(np.uint16)
+        alpha = pixels[..., 3:]
+        if self.opacity < 1.0:
+            alpha = (alpha * round(self.opacity * 255) + 127) // 255
+        np.multiply(pixels[..., :3], alpha, out=self._premultiplied)
+        np.subtract(255, alpha, out=self._inverse_alpha)
+        self._dirty = False
+
+    def blend(self, pixels, region: Box, area: Box):
+        """Blend the part of the layer inside area over a region of pixels
+
+        pixels is a uint16 RGB array covering region, in screen coordinates.
+        """
+        x0, y0, x1, y1 = area
+        rx, ry = region[0], region[1]
+        lx, ly = self.box[0], self.box[1]
+
+        target = pixels[y0 - ry:y1 - ry, x0 - rx:x1 - rx]
+        target *= self._inverse_alpha[y0 - ly:y1 - ly, x0 - lx:x1 - lx]
+        target += self._premultiplied[y0 - ly:y1 - ly, x0 - lx:x1 - lx]
+        # Divide by 255 with rounding; exact for fully opaque and clear pixels
+        target += 127
+        target //= 255
+
+class Compositor:
+    """Combines the screen image with overlay layers into the output frame
+
+    The screen is the opaque bottom layer and is rendered by the caller,
+    into either an RGB image or an RGB565Image.
+    Overlays are kept in z order. Each frame, only layers that were
+    invalidated are re-rendered, and only damaged areas of the output are
+    composited again.
+    """
+
+    def __init__(self, base: Image.Image):
+        self.base = base
+        self.output = base.copy()
+        self.width, self.height = base.size
+        self.layers: List[Layer] = []
+
+        # Output areas to recomposite that the screen did not report
+        self.damage: List[Box] = []
+
+    def add_layer(self, layer: Layer) -> Layer:
+        """Add an overlay layer above any with a lower z"""
+        layer.compositor = self
+        self.layers.append(layer)
+        self.layers.sort(key=lambda l: l.z)
+        if layer.visible:
+            self.damage.append(layer.box)
+        return layer
+
+    def remove_layer(self, layer: Layer):
+        """Remove an overlay layer"""
+        if layer in self.layers:
+            self.layers.remove(layer)
+            layer.compositor = None
+            if layer.visible:
+                self.damage.append(layer.box)
+
+    def composite(self, screen_damage: Optional[List[Box]]) -> Optional[List[Box]]:
+        """Bring the output frame up to date
+
+        screen_damage is what the screen repainted this frame (None for all
+        of it). Returns the output areas that changed, or None if the whole
+        frame was recomposited.
+        """
+        for layer in self.layers:
+            if layer.visible and layer._dirty:
+                layer.render()
+
+        if screen_damage is None:
+            self.damage = []
+            regions = [(0, 0, self.width, self.height)]
+        else:
+            regions = []
+            for box in screen_damage + self.damage:
+                box = _intersect(box, (0, 0, self.width, self.height))
+                if box and box not in regions:
+                    regions.append(box)
+            self.damage = []
+
+        for region in regions:
+            self._composite_region(region)
+
+        return None if screen_damage is None else regions
+
+    def _composite_region(self, region: Box):
+        """Recomposite one area of the output"""
+        overlaps = []
+        for layer in self.layers:
+            if layer.visible:
+                area = _intersect(region, layer.box)
+                if area:
+                    overlaps.append((layer, area))
+
+        screen = self.base.crop(region)
+        if not overlaps:
+            self.output.paste(screen, region[:2])
+            return
+
+        pixels = np.asarray(screen)
+        if pixels.ndim == 2:
+            # The screen is drawn in RGB565; blend in RGB and pack on paste
+            pixels = unpack_rgb565(pixels)
+        pixels = pixels.astype(np.uint16)
+        for layer, area in overlaps:
+            layer.blend(pixels, region, area)
+        self.output.paste(Image.fromarray(pixels.astype(np.uint8), "RGB"), region[:2])
@@ -12,7 +12,25 @@ DEFAULT_CONFIG = {
         "rotation": 0,  # 0, 90, 180, 270 degrees
         "brightness": 50,  # 0-100%
         "theme": "default",  # default, dark, light
-        "update_interval": 1.0,  # seconds
+        "update_interval": 1.0,  # seconds between battery/system stats reads
+        "max_fps": 20,  # frame rate while active
+        "idle_fps": 1,  # frame rate when nothing is changing
+        "input_hold": 2.0,  # seconds at max_fps after a button press
+        "sleep_timeout": 120,  # seconds without input before the display sleeps (0 = never)
+        "backend": "spidev",  # spidev (userspace SPI) or fbtft (kernel framebuffer)
+        "fb_device": "/dev/fb1",  # framebuffer device for the fbtft backend
+        "partial_updates": True,  # only send damaged regions over SPI
+        "pixel_format": "rgb565",  # rgb565, or rgb444 for 25% fewer SPI bytes per frame
+        "frame_diff": True,  # skip unchanged tiles and identical frames
+        "diff_tile_size": 16,  # pixels per side of a comparison tile
+        "threaded_transfer": False,  # push frames from a background thread
+        "transfer_buffers": 3,  # 2 = double, 3 = triple buffering
+        "surface_cache_kb": 512,  # memory for cached component surfaces
+        "transition": "slide",  # screen change animation: slide, fade or none
+        "transition_duration": 0.25,  # seconds
+        "screen_cache_size": 4,  # screens kept built, including the current one
+        "preload_screens": True,  # build likely next screens while idle
+        "canvas": "rgb",  # rgb (PIL) or rgb565 (draw in the panel's pixel format)
     },
     
     # Battery settings
@@ -4,7 +4,10 @@
 import os
 import logging
 import shutil
-from PIL import ImageFont
+import string
+from collections import OrderedDict
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
 
 # Directories to search for fonts
 FONT_DIRS = [
@@ -28,9 +31,139 @@ DEFAULT_FONT_FILES = {
     "bold": ["Font01.ttf", "DejaVuSans-Bold.ttf", "FreeSansBold.ttf"]
 }
 
+# Characters rasterised as soon as an atlas is created
+PRELOAD_CHARACTERS = string.ascii_letters + string.digits + string.punctuation + " "
+
 # Singleton font manager
 _font_manager = None
 
+class GlyphAtlas:
+    """Pre-rasterised glyphs of one font packed into a single mask
+    
+    Each glyph is drawn through FreeType once and stored in a shared 8 bit
+    coverage mask together with its offset and advance width. Strings are
+    laid out from the cached glyphs, and the resulting masks and widths are
+    kept for the most recently used strings, so drawing the same text again
+    is a single bitmap blit. Glyphs are placed at whole pixels and kerning
+    is not applied.
+    """
+    
+    ATLAS_WIDTH = 256
+    
+    def __init__(self, font, max_strings: int = 128):
+        """Initialize the atlas and rasterise the common characters"""
+        self.font = font
+        self.max_strings = max_strings
+        
+        # char -> (atlas x, atlas y, width, height, left, top, advance)
+        self.glyphs = {}
+        self.mask = np.zeros((64, self.ATLAS_WIDTH), dtype=np.uint8)
+        
+        # Shelf packing position
+        self._shelf_x = 0
+        self._shelf_y = 0
+        self._shelf_height = 0
+        
+        # text -> (width, bbox, mask image or None), least recently used first
+        self.strings = OrderedDict()
+        
+        for char in PRELOAD_CHARACTERS:
+            self._add_glyph(char)
+    
+    def _add_glyph(self, char):
+        """Rasterise a glyph into the atlas"""
+        left, top, right, bottom = self.font.getbbox(char)
+        width, height = max(0, right - left), max(0, bottom - top)
+        advance = self.font.getlength(char)
+        
+        x = y = 0
+        if width and height:
+            glyph = Image.new("L", (width, height))
+            ImageDraw.Draw(glyph).text((-left, -top), char, fill=255, font=self.font)
+            x, y = self._allocate(width, height)
+            self.mask[y:y + height, x:x + width] = np.asarray(glyph)
+        
+        entry = (x, y, width, height, left, top, advance)
+        self.glyphs[char] = entry
+        return entry
+    
+    def _allocate(self, width, height):
+        """Find space for a glyph, growing the atlas if it is full"""
+        rows, columns = self.mask.shape
+        if width > columns:
+            self.mask = np.pad(self.mask, ((0, 0), (0, width - columns)))
+            columns = width
+        
+        # Start a new shelf when the current one is full
+        if self._shelf_x + width > columns:
+            self._shelf_y += self._shelf_height
+            self._shelf_x = 0
+            self._shelf_height = 0
+        
+        if self._shelf_y + height > rows:
+            self.mask = np.pad(self.mask, ((0, max(rows, height)), (0, 0)))
+        
+        x, y = self._shelf_x, self._shelf_y
+        self._shelf_x += width
+        self._shelf_height = max(self._shelf_height, height)
+        return x, y
+    
+    def layout(self, text):
+        """Get the width, bounding box and coverage mask of a string
+        
+        The bounding box is relative to the text origin, like
+        ImageFont.getbbox. The mask is None if nothing would be drawn.
+        """
+        entry = self.strings.get(text)
+        if entry is not None:
+            self.strings.move_to_end(text)
+            return entry
+        
+        # Place the glyphs along the baseline
+        pen = 0.0
+        placed = []
+        for char in text:
+            glyph = self.glyphs.get(char) or self._add_glyph(char)
+            x, y, width, height, left, top, advance = glyph
+            if width and height:
+                placed.append((x, y, width, height, round(pen) + left, top))
+            pen += advance
+        
+        if placed:
+            x0 = min(p[4] for p in placed)
+            y0 = min(p[5] for p in placed)
+            x1 = max(p[4] + p[2] for p in placed)
+            y1 = max(p[5] + p[3] for p in placed)
+            
+            # Combine the glyph masks, keeping the stronger coverage where
+            # neighbouring glyphs overlap
+            mask = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+            for x, y, width, height, dx, dy in placed:
+                target = mask[dy - y0:dy - y0 + height, dx - x0:dx - x0 + width]
+                np.maximum(target, self.mask[y:y + height, x:x + width], out=target)
+            entry = (pen, (x0, y0, x1, y1), Image.fromarray(mask, "L"))
+        else:
+            entry = (pen, (0, 0, 0, 0), None)
+        
+        self.strings[text] = entry
+        if len(self.strings) > self.max_strings:
+            self.strings.popitem(last=False)
+        return entry
+    
+    def get_length(self, text) -> float:
+        """Get the advance width of a string"""
+        return self.layout(text)[0]
+    
+    def get_bbox(self, text):
+        """Get the bounding box of a string relative to its origin"""
+        return self.layout(text)[1]
+    
+    def draw_text(self, canvas, xy, text, fill):
+        """Draw a string onto an ImageDraw canvas with its origin at xy"""
+        _, (left, top, _, _), mask = self.layout(text)
+        if mask is not None:
+            canvas.bitmap((round(xy[0]) + left, round(xy[1]) + top), mask, fill=fill)
+
 class FontManager:
     """Manages fonts for PeTTraC UI"""
     
@@ -39,6 +172,7 @@ class FontManager:
         self.fonts = {}
         self.default_font = None
         self.font_paths = {}
+        self.atlases = {}  # font -> GlyphAtlas, built on first use
         
         # Find available fonts
         self._find_fonts()
@@ -127,6 +261,14 @@ class FontManager:
         self._load_font(font_key, font_type, size)
         return self.fonts[font_key]
     
+    def get_atlas(self, font):
+        """Get the glyph atlas for a loaded font"""
+        atlas = self.atlases.get(font)
+        if atlas is None:
+            atlas = GlyphAtlas(font)
+            self.atlases[font] = atlas
+        return atlas
+    
     def install_fonts(self, dest_dir=None):
         """Install fonts from example code to main folder for better accessibility"""
         if dest_dir is None:
@@ -179,4 +321,13 @@ def get_font(type_name="regular", size_name="medium"):
 def get_font_by_size(size, type_name="regular"):
     """Convenience function to get a font by exact pixel size"""
     font_manager = get_font_manager()
-    return font_manager.get_font_by_size(size, type_name) 
\ No newline at end of file
+    return font_manager.get_font_by_size(size, type_name) 
+
+def get_atlas(font):
+    """Convenience function to get the glyph atlas for a font"""
+    font_manager = get_font_manager()
+    return font_manager.get_atlas(font)
+
+def draw_text(canvas, xy, text, font, fill):
+    """Convenience function to draw text through the font's glyph atlas"""
+    get_atlas(font).draw_text(canvas, xy, text, fill)
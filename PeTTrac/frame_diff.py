@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# PeTTraC Frame Differencing
+# Finds the parts of a frame that changed since the last one sent to the display
+
+import numpy as np
+from typing import List, Optional, Tuple
+
+from pixel_format import RGB565Converter
+
+Box = Tuple[int, int, int, int]
+
+class TileDiffer:
+    """Compares frames tile by tile to work out what needs to be sent
+
+    The last transmitted frame is kept in RGB565, the format the panel
+    stores, so colour changes too small to show on the panel are ignored.
+    Changed tiles are merged into a small number of rectangular windows that
+    can be passed to the display as damaged regions.
+    """
+
+    def __init__(self, width: int, height: int, tile_size: int = 16, max_windows: int = 8):
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        self.max_windows = max_windows
+
+        # Tile grid, rounded up so partial tiles at the edges are covered
+        self.rows = -(-height // tile_size)
+        self.cols = -(-width // tile_size)
+
+        # Current frame and the last one sent, both in panel format
+        self.converter = RGB565Converter(width, height)
+        self.previous = np.zeros((height, width), dtype='>u2')
+        self.has_previous = False
+
+        # Per-pixel change mask padded to whole tiles (padding stays False)
+        self._changed = np.zeros((self.rows * tile_size, self.cols * tile_size), dtype=bool)
+
+    def reset(self):
+        """Forget the previous frame so the next one is sent in full"""
+        self.has_previous = False
+
+    def scroll(self, top: int, bottom: int, rows: int):
+        """Move rows of the last frame the way the panel's hardware scroll does
+
+        The contents of rows top to bottom move up by rows (down if
+        negative), wrapping round within the band, so the next diff only
+        finds what the scroll did not already put in place.
+        """
+        if self.has_previous:
+            band = self.previous[top:bottom]
+            band[...] = np.roll(band, -rows, axis=0)
+
+    def diff(self, rgb, regions: Optional[List[Box]] = None) -> Optional[List[Box]]:
+        """Compare an RGB888 frame with the last one
+
+        regions optionally limits the comparison to areas the caller knows
+        may have changed; the rest of the frame is assumed to be unchanged.
+        Returns None if the whole frame should be sent, an empty list if
+        nothing changed, or a list of (x0, y0, x1, y1) windows otherwise.
+        """
+        if not self.has_previous:
+            self.converter.convert(rgb)
+            self._keep(None)
+            self.has_previous = True
+            return None
+
+        boxes = self._clip(regions)
+        if not boxes:
+            return []
+
+        if regions is None:
+            np.not_equal(self.converter.convert(rgb), self.previous,
+                         out=self._changed[:self.height, :self.width])
+        else:
+            self._changed.fill(False)
+            for x0, y0, x1, y1 in boxes:
+                np.not_equal(self.converter.convert(rgb, (x0, y0, x1, y1)),
+                             self.previous[y0:y1, x0:x1],
+                             out=self._changed[y0:y1, x0:x1])
+
+        tiles = self._changed.reshape(self.rows, self.tile_size,
+                                      self.cols, self.tile_size).any(axis=(1, 3))
+        if not tiles.any():
+            return []
+
+        self._keep(None if regions is None else boxes)
+        return self._tiles_to_windows(tiles)
+
+    def _clip(self, regions) -> List[Box]:
+        """Clip regions to the frame and drop empty ones"""
+        if regions is None:
+            return [(0, 0, self.width, self.height)]
+
+        boxes = []
+        for x0, y0, x1, y1 in regions:
+            x0, y0 = max(0, int(x0)), max(0, int(y0))
+            x1, y1 = min(self.width, int(x1)), min(self.height, int(y1))
+            if x0 < x1 and y0 < y1:
+                boxes.append((x0, y0, x1, y1))
+        return boxes
+
+    def _keep(self, boxes):
+        """Copy the converted frame (or boxes of it) into the previous frame"""
+        if boxes is None:
+            np.copyto(self.previous, self.converter.frame)
+            return
+        for x0, y0, x1, y1 in boxes:
+            self.previous[y0:y1, x0:x1] = self.converter.frame[y0:y1, x0:x1]
+
+    def _tiles_to_windows(self, tiles) -> List[Box]:
+        """Merge changed tiles into rectangles
+
+        Runs of changed tiles in each tile row become spans; a span that
+        continues the same columns as one in the row above extends that
+        rectangle downwards.
+        """
+        rects = []
+        open_rects = {}
+
+        for row in range(self.rows):
+            edges = np.flatnonzero(np.diff(tiles[row], prepend=False, append=False))
+            spans = zip(edges[::2].tolist(), edges[1::2].tolist())
+
+            still_open = {}
+            for span in spans:
+                rect = open_rects.get(span)
+                if rect is None:
+                    rect = [span[0], row, span[1], row + 1]
+                    rects.append(rect)
+                else:
+                    rect[3] = row + 1
+                still_open[span] = rect
+            open_rects = still_open
+
+        # Too many windows cost more in setup commands than they save
+        if len(rects) > self.max_windows:
+            rects = self._row_bands(tiles)
+
+        t = self.tile_size
+        return [(c0 * t, r0 * t, min(c1 * t, self.width), min(r1 * t, self.height))
+                for c0, r0, c1, r1 in rects]
+
+    def _row_bands(self, tiles):
+        """Cover changed tiles with at most max_windows horizontal bands
+
+        Each run of changed tile rows becomes one band spanning the changed
+        columns; if there are still too many, the bands closest together are
+        joined first.
+        """
+        changed_rows = tiles.any(axis=1)
+        first = tiles.argmax(axis=1)
+        last = self.cols - tiles[:, ::-1].argmax(axis=1)
+
+        bands = []
+        for row in np.flatnonzero(changed_rows).tolist():
+            c0, c1 = int(first[row]), int(last[row])
+            if bands and bands[-1][3] == row:
+                band = bands[-1]
+                band[0], band[2], band[3] = min(band[0], c0), max(band[2], c1), row + 1
+            else:
+                bands.append([c0, row, c1, row + 1])
+
+        while len(bands) > self.max_windows:
+            gaps = [bands[i + 1][1] - bands[i][3] for i in range(len(bands) - 1)]
+            i = gaps.index(min(gaps))
+            a, b = bands[i], bands.pop(i + 1)
+            a[0], a[2], a[3] = min(a[0], b[0]), max(a[2], b[2]), b[3]
+
+        return bands
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# PeTTraC Frame Rate Governor
+# Lowers the frame rate while nothing on screen is changing
+
+import time
+from typing import Optional
+
+from event_system import get_event_bus, Event, EventTypes
+from state_manager import get_app_state, Observable
+
+class FrameRateGovernor:
+    """Chooses the interval until the next frame
+
+    The main loop runs at the full rate while the user is interacting,
+    while an animation has asked for frames, or right after any Observable
+    changed. Otherwise it drops to the idle rate. Idle frames are lined up
+    with whole seconds so the clock still ticks on time.
+    """
+
+    def __init__(self, full_fps: float = 20.0, idle_fps: float = 1.0, input_hold: float = 2.0):
+        self.full_fps = full_fps
+        self.idle_fps = idle_fps
+        self.input_hold = input_hold  # seconds of full rate after a button edge
+
+        self.app_state = get_app_state()
+        self.event_bus = get_event_bus()
+
+        # Start at the full rate while the first screen settles
+        self.active_until = time.time() + input_hold
+        self._last_change_count = Observable.change_count
+
+        # Any button edge brings the loop back to full rate
+        self.event_bus.subscribe(EventTypes.BUTTON_PRESS, self._on_input)
+        self.event_bus.subscribe(EventTypes.BUTTON_RELEASE, self._on_input)
+
+        self.app_state.target_fps.value = full_fps
+
+    def _on_input(self, event: Event):
+        """Handle button events"""
+        self.keep_active(self.input_hold)
+
+    def keep_active(self, duration: float):
+        """Stay at the full rate for at least the given number of seconds"""
+        self.active_until = max(self.active_until, time.time() + duration)
+
+    def is_active(self, now: Optional[float] = None) -> bool:
+        """Check whether the loop should currently run at the full rate"""
+        if now is None:
+            now = time.time()
+
+        changed = Observable.change_count != self._last_change_count
+        return changed or now < self.active_until
+
+    def next_interval(self, frame_start: Optional[float] = None) -> float:
+        """Get the time from the start of this frame to the start of the next
+
+        frame_start is when the frame began (time.time(), default now). The
+        caller subtracts the time the frame took, so the idle wake-up is
+        worked out from the start of the frame as well.
+        """
+        now = time.time()
+        if frame_start is None:
+            frame_start = now
+
+        if self.is_active(now):
+            fps = self.full_fps
+            interval = 1.0 / self.full_fps
+        else:
+            fps = self.idle_fps
+            # Wake just after the next whole second if that comes first
+            interval = min(1.0 / self.idle_fps, 1.0 - (frame_start % 1.0) + 0.01)
+
+        # Publish the rate, then ignore that change when checking the next frame
+        self.app_state.target_fps.value = fps
+        self._last_change_count = Observable.change_count
+
+        return interval
@@ -4,14 +4,121 @@
 
 import logging
 import time
+import threading
 from typing import Dict, Any, Optional, List, Callable
+import numpy as np
+from PIL import Image
 
 # Import hardware interfaces
 from hardware_interface import initialize_hardware, ST7789, BatteryManager
+from frame_diff import TileDiffer
 from event_system import get_event_bus, Event, EventTypes
 from state_manager import get_app_state
 from config import get_config
 
+class DisplayWorker:
+    """Pushes finished frames to the display on a background thread
+    
+    The main loop hands over frames with submit() and goes on rendering the
+    next one while this thread converts and transfers the previous frame.
+    Frames are copied into a small pool of preallocated buffers (two for
+    double buffering, three for triple buffering). If a new frame arrives
+    before the pending one was sent, the pending frame is dropped and its
+    damaged regions are carried over to the new one.
+    """
+    
+    def __init__(self, display, display_lock, buffers: int = 3):
+        self.display = display
+        self.display_lock = display_lock
+        
+        size = (display.width, display.height)
+        self._free = [Image.new("RGB", size, "BLACK") for _ in range(max(2, buffers))]
+        self._pending = None  # (buffer, regions) waiting to be sent
+        self._lock = threading.Lock()
+        self._frame_ready = threading.Condition(self._lock)
+        
+        self.running = False
+        self.thread = None
+        self.frames_sent = 0
+        self.frames_dropped = 0
+    
+    def start(self):
+        """Start the worker thread"""
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="DisplayWorker", daemon=True)
+        self.thread.start()
+    
+    def stop(self, timeout: float = 1.0):
+        """Stop the worker thread, discarding any frame not yet sent"""
+        with self._lock:
+            self.running = False
+            self._frame_ready.notify()
+        if self.thread:
+            self.thread.join(timeout)
+            self.thread = None
+    
+    def submit(self, image, regions=None):
+        """Queue a frame for display, replacing any frame not yet sent"""
+        with self._lock:
+            if self._free:
+                buffer = self._free.pop()
+            else:
+                # Double buffering: the only spare buffer is the pending frame
+                buffer, pending_regions = self._pending
+                self._pending = None
+                regions = self._merge_regions(pending_regions, regions)
+                self.frames_dropped += 1
+        
+        # Buffers start as RGB images; match the format of the frames sent
+        if type(buffer) is not type(image):
+            buffer = image.copy()
+        else:
+            buffer.paste(image)
+        
+        with self._lock:
+            if self._pending:
+                stale, pending_regions = self._pending
+                self._free.append(stale)
+                regions = self._merge_regions(pending_regions, regions)
+                self.frames_dropped += 1
+            self._pending = (buffer, regions)
+            self._frame_ready.notify()
+    
+    def _merge_regions(self, first, second):
+        """Combine the damage of a dropped frame with the frame replacing it"""
+        if first is None or second is None:
+            return None
+        return list(first) + list(second)
+    
+    def _run(self):
+        """Worker loop: send the most recent frame whenever one is ready"""
+        while True:
+            with self._lock:
+                while self.running and self._pending is None:
+                    self._frame_ready.wait()
+                if not self.running:
+                    return
+                buffer, regions = self._pending
+                self._pending = None
+            
+            try:
+                with self.display_lock:
+                    self.display.ShowImage(buffer, regions)
+                self.frames_sent += 1
+            except Exception as e:
+                logging.error(f"Error in display worker: {e}")
+            finally:
+                with self._lock:
+                    self._free.append(buffer)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get display worker statistics"""
+        return {
+            "frames_sent": self.frames_sent,
+            "frames_dropped": self.frames_dropped
+        }
+
+
 class HardwareManager:
     """Manages hardware components and interfaces with the application"""
     
@@ -34,6 +141,28 @@ class HardwareManager:
         self.battery = None
         self.hw_initialized = False
         
+        # Optional background thread that owns display transfers
+        self.display_worker = None
+        self.display_lock = threading.RLock()
+        
+        # Set from the GPIO thread when a button goes down
+        self.input_event = threading.Event()
+        
+        # Battery and system stats are polled at a fixed interval
+        self.stats_interval = self.config.get("display", "update_interval") or 1.0
+        self.last_stats_time = 0
+        
+        # Display power state: the panel sleeps after a period without input
+        self.sleep_timeout = self.config.get("display", "sleep_timeout") or 0
+        self.last_activity_time = time.time()
+        self.wake_requested_at = None
+        self.last_wake_latency = None
+        self.suppressed_buttons = set()
+        
+        # Optional stage that works out which tiles changed between frames
+        self.frame_differ = None
+        self.frames_skipped = 0
+        
         # Button mapping for event conversion
         self.button_mapping = {
             'up': 'up',
@@ -67,6 +196,19 @@ class HardwareManager:
             
             # Set up button handlers
             self._setup_button_handlers()
+            self.display.set_wake_callback(self.input_event.set)
+            
+            # Compare frames tile by tile so only changed areas are sent
+            if self.config.get("display", "frame_diff"):
+                tile_size = self.config.get("display", "diff_tile_size") or 16
+                self.frame_differ = TileDiffer(self.display.width, self.display.height, tile_size)
+            
+            # Move display transfers to a background thread if enabled
+            if self.config.get("display", "threaded_transfer"):
+                buffers = self.config.get("display", "transfer_buffers") or 3
+                self.display_worker = DisplayWorker(self.display, self.display_lock, buffers)
+                self.display_worker.start()
+                logging.info(f"Display worker started with {buffers} frame buffers")
             
             self.hw_initialized = True
             logging.info("Hardware initialized successfully")
@@ -87,6 +229,8 @@ class HardwareManager:
             return
         
         try:
+            now = time.time()
+            
             # Update button states and publish events on changes
             new_states = self.display.update_button_states()
             
@@ -97,22 +241,37 @@ class HardwareManager:
                 
                 # Button was just pressed
                 if new_state and not old_state:
-                    self.event_bus.publish_by_type(
-                        EventTypes.BUTTON_PRESS, 
-                        {"button": app_name}
-                    )
+                    self.last_activity_time = now
+                    if self.app_state.display_asleep.value:
+                        # The press only wakes the display; the UI never sees it
+                        self.suppressed_buttons.add(hw_name)
+                        self._wake_display()
+                    else:
+                        self.event_bus.publish_by_type(
+                            EventTypes.BUTTON_PRESS, 
+                            {"button": app_name}
+                        )
                 # Button was just released
                 elif not new_state and old_state:
-                    self.event_bus.publish_by_type(
-                        EventTypes.BUTTON_RELEASE, 
-                        {"button": app_name}
-                    )
+                    if hw_name in self.suppressed_buttons:
+                        self.suppressed_buttons.discard(hw_name)
+                    else:
+                        self.event_bus.publish_by_type(
+                            EventTypes.BUTTON_RELEASE, 
+                            {"button": app_name}
+                        )
                 
                 # Update state
                 self.button_states[hw_name] = new_state
             
-            # Get battery status
-            if self.battery:
+            # Put the display to sleep once it has been left alone long enough
+            if (self.sleep_timeout > 0 and not self.app_state.display_asleep.value
+                    and now - self.last_activity_time >= self.sleep_timeout):
+                self._sleep_display()
+            
+            # Get battery status (at most once per stats interval)
+            if self.battery and now - self.last_stats_time >= self.stats_interval:
+                self.last_stats_time = now
                 percentage = self.battery.get_battery_percentage()
                 voltage = self.battery.get_battery_voltage()
                 charging = self.battery.is_charging()
@@ -126,18 +285,106 @@ class HardwareManager:
         except Exception as e:
             logging.error(f"Error updating hardware state: {e}")
     
-    def render_to_display(self, image):
-        """Render an image to the physical display"""
+    def wait_for_input(self, timeout: float) -> bool:
+        """Sleep for up to timeout seconds, waking early if a button goes down"""
+        woken = self.input_event.wait(timeout)
+        self.input_event.clear()
+        return woken
+    
+    def render_to_display(self, image, regions=None, scroll=None):
+        """Render an image to the physical display
+        
+        regions is an optional list of damaged (x0, y0, x1, y1) boxes; when
+        given, only those areas are transferred to the panel. scroll is an
+        optional (box, rows) hint that the contents of box moved up by rows
+        since the last frame, which the panel may do itself.
+        """
         if not self.hw_initialized or not self.display:
             return False
         
+        # Nothing is drawn while the display sleeps
+        if self.app_state.display_asleep.value:
+            return False
+        
         try:
-            self.display.ShowImage(image)
+            if scroll and regions:
+                regions = self._hardware_scroll(scroll, regions)
+            
+            # Narrow the caller's damage down to what actually changed on screen
+            if self.frame_differ and regions != []:
+                regions = self.frame_differ.diff(np.asarray(image), regions)
+            if regions == [] and self.wake_requested_at is None:
+                self.frames_skipped += 1
+                return True
+            
+            if self.wake_requested_at is not None:
+                # Send the first frame after waking directly so the backlight
+                # only comes back on once it is on the panel
+                with self.display_lock:
+                    if regions != []:
+                        self.display.ShowImage(image, regions)
+                self._finish_wake()
+            elif self.display_worker:
+                self.display_worker.submit(image, regions)
+            else:
+                with self.display_lock:
+                    self.display.ShowImage(image, regions)
             return True
         except Exception as e:
             logging.error(f"Error rendering to display: {e}")
             return False
     
+    def _hardware_scroll(self, scroll, regions):
+        """Scroll the panel's memory so only newly exposed rows need sending
+        
+        The controller scrolls whole rows, so the frame differ works out
+        what still differs across the band afterwards, such as the exposed
+        rows or anything beside the scrolled box. Without the differ, or
+        with the transfer thread (which may merge frames), the hint is
+        ignored. Returns the regions to diff.
+        """
+        box, rows = scroll
+        top, bottom = max(0, box[1]), min(self.display.height, box[3])
+        if not self.frame_differ or self.display_worker or not 0 < abs(rows) < bottom - top:
+            return regions
+        
+        with self.display_lock:
+            if not self.display.set_scroll_area(top, bottom) or not self.display.scroll(rows):
+                return regions
+        
+        self.frame_differ.scroll(top, bottom, rows)
+        return regions + [(0, top, self.display.width, bottom)]
+    
+    def _sleep_display(self):
+        """Turn the backlight off and put the panel to sleep"""
+        if not self.hw_initialized or not self.display:
+            return
+        
+        try:
+            with self.display_lock:
+                self.display.sleep()
+            self.app_state.display_asleep.value = True
+            logging.info("Display asleep after inactivity")
+        except Exception as e:
+            logging.error(f"Error putting display to sleep: {e}")
+    
+    def _wake_display(self):
+        """Bring the panel out of sleep; the backlight returns with the next frame"""
+        self.wake_requested_at = time.perf_counter()
+        try:
+            with self.display_lock:
+                self.display.wake()
+        except Exception as e:
+            logging.error(f"Error waking display: {e}")
+        self.app_state.display_asleep.value = False
+    
+    def _finish_wake(self):
+        """Restore the backlight and report how long the wake took"""
+        self.display.bl_DutyCycle(self.app_state.brightness.value)
+        self.last_wake_latency = time.perf_counter() - self.wake_requested_at
+        self.wake_requested_at = None
+        logging.info(f"Display awake, first frame after {self.last_wake_latency * 1000:.1f} ms")
+    
     def _handle_setting_change(self, event: Event):
         """Handle settings change events"""
         setting_name = event.data.get("name")
@@ -147,6 +394,8 @@ class HardwareManager:
             self._set_brightness(value)
         elif setting_name == "rotation" and value is not None:
             self._set_rotation(value)
+        elif setting_name == "pixel_format" and value is not None:
+            self._set_pixel_format(value)
     
     def _set_brightness(self, brightness: int):
         """Set display brightness"""
@@ -155,7 +404,8 @@ class HardwareManager:
         
         try:
             brightness = max(0, min(100, brightness))
-            self.display.bl_DutyCycle(brightness)
+            if not self.app_state.display_asleep.value:
+                self.display.bl_DutyCycle(brightness)
             # Save to config
             self.config.set("display", "brightness", brightness)
             logging.info(f"Brightness set to {brightness}%")
@@ -169,19 +419,45 @@ class HardwareManager:
         
         try:
             if rotation in (0, 90, 180, 270):
-                self.display.set_rotation(rotation)
+                with self.display_lock:
+                    self.display.set_rotation(rotation)
+                if self.frame_differ:
+                    self.frame_differ.reset()
                 # Save to config
                 self.config.set("display", "rotation", rotation)
                 logging.info(f"Rotation set to {rotation} degrees")
         except Exception as e:
             logging.error(f"Error setting rotation: {e}")
     
+    def _set_pixel_format(self, pixel_format: str):
+        """Set the pixel format frames are sent in
+        
+        RGB444 suits content where frame rate matters more than colour
+        depth; the choice is not saved, so it lasts until the next start.
+        """
+        if not self.hw_initialized or not self.display:
+            return
+        
+        try:
+            with self.display_lock:
+                supported = self.display.set_pixel_format(pixel_format)
+            if supported:
+                logging.info(f"Pixel format set to {pixel_format}")
+            else:
+                logging.warning(f"Pixel format {pixel_format} not supported by the display")
+        except Exception as e:
+            logging.error(f"Error setting pixel format: {e}")
+    
     def shutdown(self):
         """Clean up hardware resources"""
         if not self.hw_initialized:
             return
             
         try:
+            if self.display_worker:
+                self.display_worker.stop()
+                self.display_worker = None
+            
             if self.display:
                 self.display.clear()
                 self.display.module_exit()
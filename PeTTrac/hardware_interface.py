@@ -3,7 +3,11 @@
 
 import os
 import sys
+import stat
+import mmap
 import time
+import fcntl
+import functools
 import spidev
 import logging
 import numpy as np
@@ -12,6 +16,7 @@ import psutil
 
 # Import configuration
 from config import get_config
+from pixel_format import RGB565Converter, RGB444Converter
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -42,6 +47,11 @@ LCD_BL_PIN     = 24
 # PiSugar I2C address
 PISUGAR_I2C_ADDR = 0x57
 
+# Framebuffer blanking ioctl (linux/fb.h)
+FBIOBLANK = 0x4611
+FB_BLANK_UNBLANK = 0
+FB_BLANK_POWERDOWN = 4
+
 class RaspberryPi:
     def __init__(self, spi=spidev.SpiDev(0,0), spi_freq=40000000, 
                  rst=LCD_RST_PIN, dc=LCD_DC_PIN, bl=LCD_BL_PIN, 
@@ -103,12 +113,17 @@ class RaspberryPi:
         self.button_debounce_ms = 100  # Minimum ms between button presses
 
     def gpio_mode(self, pin, mode, pull_up=None, active_state=True):
+        if pin is None:
+            # Pin is owned by a kernel driver (e.g. fbtft)
+            return None
         if mode:
             return DigitalOutputDevice(pin, active_high=True, initial_value=False)
         else:
             return DigitalInputDevice(pin, pull_up=pull_up, active_state=active_state)
 
     def digital_write(self, pin, value):
+        if pin is None:
+            return
         if value:
             pin.on()
         else:
@@ -127,6 +142,19 @@ class RaspberryPi:
         if self.SPI is not None:
             self.SPI.writebytes(data)
 
+    def spi_writebuffer(self, buf):
+        """Write a NumPy array or other buffer in a single call"""
+        if self.SPI is None:
+            return
+        data = buf.view(self.np.uint8) if isinstance(buf, self.np.ndarray) else buf
+        if hasattr(self.SPI, "writebytes2"):
+            # writebytes2 takes buffer objects and splits them into transfers itself
+            self.SPI.writebytes2(data)
+        else:
+            data = bytes(data)
+            for i in range(0, len(data), 4096):
+                self.SPI.writebytes(list(data[i:i+4096]))
+
     def bl_DutyCycle(self, duty):
         # Ensure duty cycle is within valid range
         duty = max(0, min(100, duty))
@@ -182,6 +210,13 @@ class RaspberryPi:
         
         return self.button_states
         
+    def set_wake_callback(self, callback_func):
+        """Call a function from the GPIO thread whenever any button goes down"""
+        for pin in (self.GPIO_KEY_UP_PIN, self.GPIO_KEY_DOWN_PIN, self.GPIO_KEY_LEFT_PIN,
+                    self.GPIO_KEY_RIGHT_PIN, self.GPIO_KEY_PRESS_PIN, self.GPIO_KEY1_PIN,
+                    self.GPIO_KEY2_PIN, self.GPIO_KEY3_PIN):
+            pin.when_activated = callback_func
+        
     def register_button_callback(self, button, callback_func):
         """Register a callback function for a button press"""
         if button in self.button_callbacks:
@@ -190,12 +225,86 @@ class RaspberryPi:
         return False
 
 
+class CommandList:
+    """A list of ST7789 commands, each with its parameter bytes
+    
+    Keeping a command's parameters together lets them go out in a single
+    SPI transfer instead of one transfer per byte.
+    """
+    
+    def __init__(self, commands=()):
+        self.commands = [(cmd, bytes(params)) for cmd, params in commands]
+    
+    def add(self, cmd, *params):
+        """Append a command and return the list for chaining"""
+        self.commands.append((cmd, bytes(params)))
+        return self
+    
+    def __iter__(self):
+        return iter(self.commands)
+    
+    def __len__(self):
+        return len(self.commands)
+
+
+@functools.lru_cache(maxsize=128)
+def window_commands(Xstart, Ystart, Xend, Yend):
+    """Build (and cache) the CASET/RASET/RAMWR sequence for a window"""
+    Xend -= 1
+    Yend -= 1
+    return CommandList([
+        (0x2A, (Xstart >> 8, Xstart & 0xff, Xend >> 8, Xend & 0xff)),  # Column address set
+        (0x2B, (Ystart >> 8, Ystart & 0xff, Yend >> 8, Yend & 0xff)),  # Row address set
+        (0x2C, ()),                                                    # Write to RAM
+    ])
+
+
 class ST7789(RaspberryPi):
     """ST7789 LCD Display Driver"""
     
     width = 240
     height = 240
     
+    # Fraction of the panel above which a partial update is sent as a full frame
+    FULL_FRAME_THRESHOLD = 0.6
+    
+    # Rows of panel memory, which the vertical scroll definition has to cover
+    MEMORY_ROWS = 320
+    
+    # Panel setup sent by Init after MADCTL
+    INIT_COMMANDS = CommandList([
+        (0xB2, (0x0C, 0x0C, 0x00, 0x33, 0x33)),     # Porch setting
+        (0xB7, (0x35,)),                            # Gate control
+        (0xBB, (0x19,)),                            # VCOM setting
+        (0xC0, (0x2C,)),                            # LCM control
+        (0xC2, (0x01,)),                            # VDV and VRH command enable
+        (0xC3, (0x12,)),                            # VRH set
+        (0xC4, (0x20,)),                            # VDV set
+        (0xC6, (0x0F,)),                            # Frame rate control
+        (0xD0, (0xA4, 0xA1)),                       # Power control
+        (0xE0, (0xD0, 0x04, 0x0D, 0x11, 0x13, 0x2B, 0x3F,
+                0x54, 0x4C, 0x18, 0x0D, 0x0B, 0x1F, 0x23)),  # Positive gamma
+        (0xE1, (0xD0, 0x04, 0x0C, 0x11, 0x13, 0x2C, 0x3F,
+                0x44, 0x51, 0x2F, 0x1F, 0x1F, 0x20, 0x23)),  # Negative gamma
+        (0x21, ()),                                 # Display inversion on
+        (0x11, ()),                                 # Sleep out
+        (0x29, ()),                                 # Display on
+    ])
+    
+    # Interface pixel formats (COLMOD values) and their converters; RGB444
+    # sends a quarter fewer bytes per frame at the cost of colour depth
+    PIXEL_FORMATS = {
+        "rgb565": (0x05, RGB565Converter),  # 16 bits per pixel
+        "rgb444": (0x03, RGB444Converter),  # 12 bits per pixel
+    }
+    
+    # Counterclockwise quarter turns that map the frame into panel orientation
+    ROTATION_TURNS = {
+        90: 3,
+        180: 2,
+        270: 1
+    }
+    
     def __init__(self, spi=spidev.SpiDev(0,0), spi_freq=40000000, 
                  rst=LCD_RST_PIN, dc=LCD_DC_PIN, bl=LCD_BL_PIN, 
                  bl_freq=1000, rotation=None):
@@ -211,6 +320,36 @@ class ST7789(RaspberryPi):
         # Default to 0 if config returns None
         if self.rotation is None:
             self.rotation = 0
+        
+        # Partial updates only send damaged regions of each frame
+        self.partial_updates = config.get("display", "partial_updates")
+        if self.partial_updates is None:
+            self.partial_updates = True
+        
+        # The panel contents are unknown until a full frame has been sent
+        self._needs_full_refresh = True
+        
+        # Window currently set on the panel, so repeated windows can be skipped
+        self._window = None
+        
+        # MADCTL value sent by Init, which decides where frame rows land in
+        # panel memory
+        self._madctl = None
+        
+        # Hardware scroll area as (top, bottom) frame rows, and how many rows
+        # its contents have been scrolled up in panel memory
+        self._scroll_area = None
+        self._scroll_offset = 0
+        
+        # When the panel last left sleep mode
+        self._sleep_out_time = 0
+        
+        # Pixel format sent over SPI, with preallocated buffers for converting to it
+        self.pixel_format = config.get("display", "pixel_format") or "rgb565"
+        if self.pixel_format not in self.PIXEL_FORMATS:
+            logging.warning(f"Unknown pixel format {self.pixel_format}, using rgb565")
+            self.pixel_format = "rgb565"
+        self.converter = self.PIXEL_FORMATS[self.pixel_format][1](self.width, self.height)
     
     def command(self, cmd):
         """Send command to display"""
@@ -236,9 +375,6 @@ class ST7789(RaspberryPi):
         self.module_init()
         self.reset()
 
-        # Default commands for display init
-        self.command(0x36)  # Memory Access Control
-        
         # Set rotation using MADCTL register
         # MADCTL bits:
         # - MY (Row Address Order): 0x80
@@ -253,135 +389,268 @@ class ST7789(RaspberryPi):
         }
         # Use the value for the specified rotation or default to 0
         madctl = rotation_values.get(self.rotation, 0x70)
-        self.data(madctl)
-
-        self.command(0x3A)  # Interface Pixel Format
-        self.data(0x05)     # 16 bits per pixel
-
-        self.command(0xB2)
-        self.data(0x0C)
-        self.data(0x0C)
-        self.data(0x00)
-        self.data(0x33)
-        self.data(0x33)
-
-        self.command(0xB7)
-        self.data(0x35) 
-
-        self.command(0xBB)
-        self.data(0x19)
-
-        self.command(0xC0)
-        self.data(0x2C)
-
-        self.command(0xC2)
-        self.data(0x01)
-
-        self.command(0xC3)
-        self.data(0x12)   
-
-        self.command(0xC4)
-        self.data(0x20)
-
-        self.command(0xC6)
-        self.data(0x0F) 
-
-        self.command(0xD0)
-        self.data(0xA4)
-        self.data(0xA1)
-
-        self.command(0xE0)
-        self.data(0xD0)
-        self.data(0x04)
-        self.data(0x0D)
-        self.data(0x11)
-        self.data(0x13)
-        self.data(0x2B)
-        self.data(0x3F)
-        self.data(0x54)
-        self.data(0x4C)
-        self.data(0x18)
-        self.data(0x0D)
-        self.data(0x0B)
-        self.data(0x1F)
-        self.data(0x23)
-
-        self.command(0xE1)
-        self.data(0xD0)
-        self.data(0x04)
-        self.data(0x0C)
-        self.data(0x11)
-        self.data(0x13)
-        self.data(0x2C)
-        self.data(0x3F)
-        self.data(0x44)
-        self.data(0x51)
-        self.data(0x2F)
-        self.data(0x1F)
-        self.data(0x1F)
-        self.data(0x20)
-        self.data(0x23)
-        
-        self.command(0x21)  # Display inversion on
-        self.command(0x11)  # Sleep out
-        self.command(0x29)  # Display on
+        colmod = self.PIXEL_FORMATS[self.pixel_format][0]
+        self.send_commands(CommandList()
+                           .add(0x36, madctl)     # Memory Access Control
+                           .add(0x3A, colmod))    # Interface Pixel Format
+        
+        self.send_commands(self.INIT_COMMANDS)
+        
+        # Panel memory is undefined after a reset, and scrolling is off
+        self._madctl = madctl
+        self._needs_full_refresh = True
+        self._window = None
+        self._scroll_area = None
+        self._scroll_offset = 0
+        self._sleep_out_time = time.time()
         
         logging.info(f"Display initialized with rotation: {self.rotation} degrees")
+    
+    def send_commands(self, commands):
+        """Send a CommandList, each command's parameters in one SPI transfer"""
+        for cmd, params in commands:
+            self.command(cmd)
+            if params:
+                self.digital_write(self.GPIO_DC_PIN, True)
+                self.spi_writebuffer(params)
   
     def SetWindows(self, Xstart, Ystart, Xend, Yend):
-        """Set the display window area"""
-        # Set the X coordinates
-        self.command(0x2A)
-        self.data(0x00)               # Set the horizontal starting point to the high octet
-        self.data(Xstart & 0xff)      # Set the horizontal starting point to the low octet
-        self.data(0x00)               # Set the horizontal end to the high octet
-        self.data((Xend - 1) & 0xff)  # Set the horizontal end to the low octet 
-        
-        # Set the Y coordinates
-        self.command(0x2B)
-        self.data(0x00)
-        self.data((Ystart & 0xff))
-        self.data(0x00)
-        self.data((Yend - 1) & 0xff)
-
-        # Write to RAM
-        self.command(0x2C) 
-        
-    def ShowImage(self, image):
-        """Display an image on the LCD"""
+        """Set the display window area and start a RAM write"""
+        window = (Xstart, Ystart, Xend, Yend)
+        if window == self._window:
+            # The panel still has this window; only restart the RAM write
+            self.command(0x2C)
+            return
+        
+        self.send_commands(window_commands(*window))
+        self._window = window
+        
+    def ShowImage(self, image, regions=None):
+        """Display an image on the LCD
+        
+        If regions is given, only those damaged areas are sent to the panel.
+        Each region is an (x0, y0, x1, y1) box in image coordinates with
+        exclusive end, like the boxes PIL uses. Passing None sends the full
+        frame.
+        """
+        img, regions = self._prepare_frame(image, regions)
+        
+        # Convert and send each region to the display, to wherever its rows
+        # are kept in panel memory. Aligning before the split keeps whole
+        # pixel pairs in every piece
+        for box in regions:
+            box = self.converter.align(box)
+            for source, target in self._memory_boxes(box):
+                source = self._panel_box(source)
+                self.converter.convert(img, source)
+                self.SetWindows(*self._panel_box(target))
+                self.digital_write(self.GPIO_DC_PIN, True)
+                self.spi_writebuffer(self.converter.window(source))
+        
+        self._needs_full_refresh = False
+    
+    def set_scroll_area(self, top, bottom):
+        """Use frame rows top to bottom (exclusive) as the hardware scroll area
+        
+        Returns False if the panel cannot scroll those rows at the current
+        rotation; the controller scrolls gate lines, the rows of its memory,
+        which run along frame columns at some rotations. Changing the area
+        while it is scrolled sends the next frame in full.
+        """
+        if self._scroll_axis() is None or not 0 <= top < bottom <= self.height:
+            return False
+        
+        if (top, bottom) == self._scroll_area:
+            return True
+        
+        # Rows kept out of place for the old area would show in the wrong place
+        if self._scroll_offset:
+            self._needs_full_refresh = True
+        
+        first = self._scroll_first_gate(top, bottom)
+        height = bottom - top
+        below = self.MEMORY_ROWS - first - height
+        self.send_commands(CommandList()
+                           .add(0x33, first >> 8, first & 0xff, height >> 8, height & 0xff,
+                                below >> 8, below & 0xff)       # Vertical scroll definition
+                           .add(0x37, first >> 8, first & 0xff))  # Vertical scroll start address
+        self._scroll_area = (top, bottom)
+        self._scroll_offset = 0
+        return True
+    
+    def scroll(self, rows):
+        """Move the contents of the scroll area up by a number of frame rows
+        
+        Negative values move them down. Rows scrolled out at one end come
+        back in at the other, so the caller has to send the newly exposed
+        rows afterwards. Returns False if no scroll area is set.
+        """
+        if self._scroll_area is None:
+            return False
+        
+        top, bottom = self._scroll_area
+        height = bottom - top
+        self._scroll_offset = (self._scroll_offset + rows) % height
+        
+        # The gate line shown first in the area; frame rows running up the
+        # gate lines scroll the other way round
+        _, step = self._scroll_axis()
+        offset = self._scroll_offset if step > 0 else -self._scroll_offset
+        start = self._scroll_first_gate(top, bottom) + offset % height
+        self.send_commands(CommandList().add(0x37, start >> 8, start & 0xff))
+        return True
+    
+    def _scroll_axis(self):
+        """Get how frame rows map onto the gate lines the controller scrolls
+        
+        Returns (gate, step), the gate line of frame row 0 and the step of
+        +1 or -1 to the next row, or None if frame rows do not each sit on
+        one gate line.
+        """
+        if self._madctl is None:
+            return None
+        origin, right, below = (self._gate_line(x, y) for x, y in ((0, 0), (1, 0), (0, 1)))
+        if right != origin:
+            return None
+        return origin, below - origin
+    
+    def _scroll_first_gate(self, top, bottom):
+        """Get the first gate line of the frame rows top to bottom (exclusive)"""
+        gate, step = self._scroll_axis()
+        return min(gate + step * top, gate + step * (bottom - 1))
+    
+    def _gate_line(self, x, y):
+        """Get the gate line (memory row) a frame pixel is written to"""
+        x, y = self._panel_box((x, y, x + 1, y + 1))[:2]
+        # With MV the column address runs along the rows; MY reverses them
+        row = x if self._madctl & 0x20 else y
+        return self.MEMORY_ROWS - 1 - row if self._madctl & 0x80 else row
+    
+    def _memory_boxes(self, box):
+        """Split a frame box by where its rows are kept in panel memory
+        
+        Returns (source, target) pairs in frame coordinates: source is part
+        of the box and target the frame rows its pixels are stored at.
+        Outside the scroll area, and while it is not scrolled, the two are
+        the same.
+        """
+        if not self._scroll_offset:
+            return [(box, box)]
+        
+        x0, y0, x1, y1 = box
+        top, bottom = self._scroll_area
+        height = bottom - top
+        
+        # Rows in the scroll area are kept scroll_offset rows further down,
+        # wrapping round to the top of the area
+        pieces = []
+        edges = sorted({y0, y1} | {y for y in (top, bottom - self._scroll_offset, bottom) if y0 < y < y1})
+        for start, end in zip(edges, edges[1:]):
+            target = start
+            if top <= start < bottom:
+                target = top + (start - top + self._scroll_offset) % height
+            pieces.append(((x0, start, x1, end), (x0, target, x1, target + end - start)))
+        return pieces
+    
+    def sleep(self):
+        """Turn the backlight off and put the panel into sleep mode
+        
+        Panel memory is kept while asleep, so the frame on screen does not
+        need to be resent on wake.
+        """
+        # The panel needs 120 ms after sleep out before it accepts sleep in
+        wait = 0.12 - (time.time() - self._sleep_out_time)
+        if wait > 0:
+            time.sleep(wait)
+        
+        self.bl_DutyCycle(0)
+        self.command(0x10)  # Sleep in
+        time.sleep(0.005)
+    
+    def wake(self):
+        """Take the panel out of sleep mode (the backlight is left off)"""
+        self.command(0x11)  # Sleep out
+        self._sleep_out_time = time.time()
+        time.sleep(0.005)   # 5 ms before the panel accepts the next command
+    
+    def _prepare_frame(self, image, regions):
+        """Get the frame as an RGB array in panel orientation and the frame boxes to send"""
         # Check image dimensions
         imwidth, imheight = image.size
         if imwidth != self.width or imheight != self.height:
             raise ValueError('Image must be same dimensions as display ({0}x{1}).'
                              .format(self.width, self.height))
         
-        # Apply rotation if needed
-        if self.rotation and self.rotation % 360 != 0:
-            # PIL rotates counterclockwise, so we use negative value
-            # Also, PIL's rotate parameter is the opposite of our rotation
-            rot_degrees = {
-                90: 270, 
-                180: 180, 
-                270: 90
-            }.get(self.rotation)
-            
-            if rot_degrees:
-                image = image.rotate(rot_degrees, expand=True)
+        # Work out which areas of the panel need to be sent
+        if regions is None or not self.partial_updates or self._needs_full_refresh:
+            regions = [(0, 0, self.width, self.height)]
+        else:
+            regions = self._normalize_regions(regions)
+            if not regions:
+                return None, []
         
-        # Convert image data to display format
+        # Rotate through a strided NumPy view instead of resampling the image;
+        # the converter reads the pixels in panel order and no copy is made.
+        # Boxes are mapped with _panel_box as they are sent
         img = self.np.asarray(image)
-        pix = self.np.zeros((self.width, self.height, 2), dtype=self.np.uint8)
-        pix[...,[0]] = self.np.add(self.np.bitwise_and(img[...,[0]], 0xF8), 
-                                   self.np.right_shift(img[...,[1]], 5))
-        pix[...,[1]] = self.np.add(self.np.bitwise_and(self.np.left_shift(img[...,[1]], 3), 0xE0), 
-                                   self.np.right_shift(img[...,[2]], 3))
-        pix = pix.flatten().tolist()
-        
-        # Send data to display
-        self.SetWindows(0, 0, self.width, self.height)
-        self.digital_write(self.GPIO_DC_PIN, True)
-        for i in range(0, len(pix), 4096):
-            self.spi_writebyte(pix[i:i+4096])
+        turns = self.ROTATION_TURNS.get(self.rotation % 360, 0)
+        if turns:
+            img = self.np.rot90(img, turns)
+        
+        return img, regions
+    
+    def _panel_box(self, box):
+        """Map a frame box to panel orientation"""
+        turns = self.ROTATION_TURNS.get(self.rotation % 360, 0)
+        return self._rotate_region(box, turns * 90)
+    
+    def _normalize_regions(self, regions):
+        """Clip regions to the panel and drop empty ones
+        
+        Overlapping regions are merged so no pixel is sent twice, and if the
+        damaged area covers most of the panel a single full-frame window is
+        used instead since it saves the extra window setup commands.
+        """
+        boxes = []
+        for x0, y0, x1, y1 in regions:
+            x0, y0 = max(0, int(x0)), max(0, int(y0))
+            x1, y1 = min(self.width, int(x1)), min(self.height, int(y1))
+            if x1 > x0 and y1 > y0:
+                boxes.append((x0, y0, x1, y1))
+        
+        # Merge overlapping boxes until none overlap
+        merged = True
+        while merged:
+            merged = False
+            for i in range(len(boxes)):
+                for j in range(i + 1, len(boxes)):
+                    a, b = boxes[i], boxes[j]
+                    if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                        boxes[i] = (min(a[0], b[0]), min(a[1], b[1]),
+                                    max(a[2], b[2]), max(a[3], b[3]))
+                        del boxes[j]
+                        merged = True
+                        break
+                if merged:
+                    break
+        
+        # Fall back to a full frame when most of the panel is damaged
+        area = sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in boxes)
+        if area >= self.width * self.height * self.FULL_FRAME_THRESHOLD:
+            return [(0, 0, self.width, self.height)]
+        
+        return boxes
+    
+    def _rotate_region(self, region, degrees):
+        """Map a region through the same counterclockwise rotation as the frame"""
+        x0, y0, x1, y1 = region
+        if degrees == 90:
+            return (y0, self.width - x1, y1, self.width - x0)
+        if degrees == 180:
+            return (self.width - x1, self.height - y1, self.width - x0, self.height - y0)
+        if degrees == 270:
+            return (self.height - y1, x0, self.height - y0, x1)
+        return region
     
     def set_rotation(self, rotation):
         """Set display rotation (0, 90, 180, or 270 degrees)"""
@@ -395,13 +664,30 @@ class ST7789(RaspberryPi):
             return True
         return False
         
+    def set_pixel_format(self, pixel_format):
+        """Switch the interface pixel format ("rgb565" or "rgb444")
+        
+        The panel keeps what it is showing; only frames sent from now on
+        use the new format.
+        """
+        if pixel_format not in self.PIXEL_FORMATS:
+            return False
+        if pixel_format != self.pixel_format:
+            colmod, converter = self.PIXEL_FORMATS[pixel_format]
+            self.send_commands(CommandList().add(0x3A, colmod))
+            self.converter = converter(self.width, self.height)
+            self.pixel_format = pixel_format
+        return True
+        
     def clear(self):
         """Clear the display"""
-        _buffer = [0xff] * (self.width * self.height * 2)
+        _buffer = self.converter.fill(0xFFFF)
         self.SetWindows(0, 0, self.width, self.height)
         self.digital_write(self.GPIO_DC_PIN, True)
-        for i in range(0, len(_buffer), 4096):
-            self.spi_writebyte(_buffer[i:i+4096])
+        self.spi_writebuffer(_buffer)
+        
+        # The next frame has to repaint the whole panel
+        self._needs_full_refresh = True
         
     def set_brightness(self, brightness):
         """Set backlight brightness (0-100)"""
@@ -412,6 +698,119 @@ class ST7789(RaspberryPi):
         return brightness
 
 
+class FramebufferDisplay(ST7789):
+    """Display backend that writes frames into a kernel framebuffer
+    
+    With the fbtft driver loaded the panel appears as /dev/fb1, and the
+    kernel takes care of the SPI transfers (with DMA and its own
+    deferred-I/O damage tracking). Frames are converted straight into the
+    memory-mapped framebuffer, so only damaged regions are ever touched.
+    The DC and reset lines belong to the kernel driver; buttons and the
+    backlight are still handled here.
+    
+    Any regular file of at least one frame in size can stand in for the
+    framebuffer device, which makes the backend usable without hardware.
+    """
+    
+    def __init__(self, device="/dev/fb1", bl=LCD_BL_PIN, bl_freq=1000, rotation=None):
+        super().__init__(spi=None, rst=None, dc=None, bl=bl, bl_freq=bl_freq,
+                         rotation=rotation)
+        self.device = device
+        self.fd = None
+        self.mm = None
+        self.stride = self.width * 2
+        
+        # The kernel driver owns the panel's pixel format
+        self.pixel_format = "rgb565"
+        
+    def Init(self):
+        """Open and memory-map the framebuffer"""
+        self._close_framebuffer()
+        
+        # Use the line length reported by the driver if there is one
+        name = os.path.basename(self.device)
+        stride_path = f"/sys/class/graphics/{name}/stride"
+        if os.path.exists(stride_path):
+            with open(stride_path, 'r') as f:
+                self.stride = int(f.read().strip())
+        
+        size = self.stride * self.height
+        self.fd = os.open(self.device, os.O_RDWR)
+        
+        # A regular file standing in for the device has to be frame-sized
+        info = os.fstat(self.fd)
+        if stat.S_ISREG(info.st_mode) and info.st_size < size:
+            os.ftruncate(self.fd, size)
+        
+        self.mm = mmap.mmap(self.fd, size, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+        
+        # fbtft expects native little-endian RGB565; convert straight into the mapping
+        fb = self.np.ndarray((self.height, self.width), dtype='<u2', buffer=self.mm,
+                             strides=(self.stride, 2))
+        self.converter = RGB565Converter(self.width, self.height, frame=fb)
+        self._needs_full_refresh = True
+        
+        logging.info(f"Framebuffer {self.device} mapped with rotation: {self.rotation} degrees")
+    
+    def ShowImage(self, image, regions=None):
+        """Write an image into the framebuffer"""
+        if self.mm is None:
+            return
+        
+        img, regions = self._prepare_frame(image, regions)
+        for box in regions:
+            self.converter.convert(img, self._panel_box(box))
+        
+        self._needs_full_refresh = False
+    
+    def sleep(self):
+        """Blank the framebuffer and turn the backlight off"""
+        self.bl_DutyCycle(0)
+        self._blank(FB_BLANK_POWERDOWN)
+    
+    def wake(self):
+        """Unblank the framebuffer (the backlight is left off)"""
+        self._blank(FB_BLANK_UNBLANK)
+    
+    def _blank(self, mode):
+        """Ask the kernel driver to blank or unblank the panel"""
+        if self.fd is None or not stat.S_ISCHR(os.fstat(self.fd).st_mode):
+            return
+        try:
+            fcntl.ioctl(self.fd, FBIOBLANK, mode)
+        except OSError as e:
+            logging.warning(f"Framebuffer blank not supported: {e}")
+    
+    def set_pixel_format(self, pixel_format):
+        """The framebuffer is always RGB565"""
+        return pixel_format == "rgb565"
+    
+    def set_scroll_area(self, top, bottom):
+        """The kernel driver owns the panel, so hardware scrolling is not available"""
+        return False
+    
+    def clear(self):
+        """Clear the display"""
+        if self.mm is not None:
+            self.converter.fill(0xFFFF)
+        self._needs_full_refresh = True
+    
+    def _close_framebuffer(self):
+        """Release the mapping and file descriptor"""
+        if self.mm is not None:
+            # Drop the NumPy view before closing the mapping it points into
+            self.converter = RGB565Converter(self.width, self.height)
+            self.mm.close()
+            self.mm = None
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+    
+    def module_exit(self):
+        self._close_framebuffer()
+        super().module_exit()
+
+
 class BatteryManager:
     """Manages PiSugar3 battery via I2C"""
     
@@ -546,7 +945,12 @@ def initialize_hardware():
     try:
         # Initialize display with rotation from config
         rotation = config.get("display", "rotation")
-        display = ST7789(rotation=rotation)
+        backend = config.get("display", "backend") or "spidev"
+        if backend == "fbtft":
+            device = config.get("display", "fb_device") or "/dev/fb1"
+            display = FramebufferDisplay(device=device, rotation=rotation)
+        else:
+            display = ST7789(rotation=rotation)
         display.Init()
         display.clear()
         
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# PeTTraC Pixel Format Conversion
+# Converts rendered frames into the byte layout the display expects
+
+import numpy as np
+
+class RGB565Converter:
+    """Converts RGB888 frames to big-endian RGB565 using preallocated buffers
+
+    All intermediate results are written into buffers allocated once at
+    construction, so converting a frame does not create any per-pixel Python
+    objects or full-size temporary arrays. The converted frame is kept in
+    `frame` and can be handed to spidev directly through the buffer protocol.
+    """
+
+    def __init__(self, width: int, height: int, frame=None):
+        self.width = width
+        self.height = height
+
+        # Converted frame in panel byte order. The SPI panel takes big-endian
+        # 16 bit words; a caller can pass its own (height, width) uint16 array
+        # of either byte order, e.g. a memory-mapped framebuffer.
+        if frame is None:
+            frame = np.zeros((height, width), dtype='>u2')
+        self.frame = frame
+
+        # Native-endian scratch planes for the colour channels
+        self._red = np.empty((height, width), dtype=np.uint16)
+        self._other = np.empty((height, width), dtype=np.uint16)
+
+        # Staging buffer used to make partial windows contiguous
+        self._window = np.empty(width * height, dtype=frame.dtype)
+
+    def convert(self, rgb, box=None):
+        """Convert an RGB888 array (or a box of it) into the frame buffer
+
+        rgb is an (height, width, 3) uint8 array, or an (height, width)
+        array that is already RGB565 (as drawn by RGB565Draw), which is only
+        copied. box is an optional (x0, y0, x1, y1) area; only that part of
+        the frame is converted. Returns a view of the converted area.
+        """
+        if box is None:
+            x0, y0, x1, y1 = 0, 0, self.width, self.height
+        else:
+            x0, y0, x1, y1 = box
+
+        src = rgb[y0:y1, x0:x1]
+        dst = self.frame[y0:y1, x0:x1]
+        if src.ndim == 2:
+            np.copyto(dst, src)
+            return dst
+
+        red = self._red[y0:y1, x0:x1]
+        other = self._other[y0:y1, x0:x1]
+
+        # RRRRRGGG GGGBBBBB
+        np.left_shift(src[..., 0], 8, out=red, dtype=np.uint16)
+        np.bitwise_and(red, 0xF800, out=red)
+        np.left_shift(src[..., 1], 3, out=other, dtype=np.uint16)
+        np.bitwise_and(other, 0x07E0, out=other)
+        np.bitwise_or(red, other, out=red)
+        np.right_shift(src[..., 2], 3, out=other, dtype=np.uint16)
+        np.bitwise_or(red, other, out=dst)
+
+        return dst
+
+    def align(self, box):
+        """Get the box to send for a region (any box can be sent as RGB565)"""
+        return box
+
+    def window(self, box):
+        """Get a contiguous buffer holding the converted pixels of a box
+
+        Full-width boxes are already contiguous in the frame buffer and are
+        returned as-is; other boxes are copied into the staging buffer.
+        """
+        x0, y0, x1, y1 = box
+        region = self.frame[y0:y1, x0:x1]
+        if region.flags['C_CONTIGUOUS']:
+            return region.reshape(-1)
+
+        staged = self._window[:region.size].reshape(region.shape)
+        staged[...] = region
+        return self._window[:region.size]
+
+    def fill(self, value: int):
+        """Fill the whole frame buffer with one RGB565 value"""
+        self.frame.fill(value)
+        return self.frame.reshape(-1)
+
+class RGB444Converter:
+    """Converts frames to 12 bit RGB444, packed two pixels into three bytes
+
+    Used with COLMOD 0x03, which needs a quarter fewer bytes per frame than
+    RGB565 at the cost of colour depth. Converted pixels are kept as 0RGB
+    nibbles in `frame`; window() packs a box into the byte stream the panel
+    expects:
+
+        RRRRGGGG BBBBRRRR GGGGBBBB
+
+    Like RGB565Converter, every buffer is allocated once at construction.
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+
+        # Converted pixels, 0000RRRR GGGGBBBB
+        self.frame = np.zeros((height, width), dtype=np.uint16)
+        self._other = np.empty((height, width), dtype=np.uint16)
+
+        # Pixels of a window in transfer order, padded to an even count,
+        # and the packed bytes
+        pairs = (width * height + 1) // 2
+        self._pixels = np.empty(pairs * 2, dtype=np.uint16)
+        self._middle = np.empty(pairs, dtype=np.uint16)
+        self._packed = np.empty(pairs * 3, dtype=np.uint8)
+
+    def convert(self, rgb, box=None):
+        """Convert an RGB888 or RGB565 array (or a box of it) into the frame
+
+        Takes the same arrays as RGB565Converter.convert. Returns a view of
+        the converted area.
+        """
+        if box is None:
+            x0, y0, x1, y1 = 0, 0, self.width, self.height
+        else:
+            x0, y0, x1, y1 = box
+
+        src = rgb[y0:y1, x0:x1]
+        dst = self.frame[y0:y1, x0:x1]
+        other = self._other[y0:y1, x0:x1]
+
+        if src.ndim == 2:
+            # RRRRRGGG GGGBBBBB -> 0000RRRR GGGGBBBB
+            np.right_shift(src, 4, out=dst, casting='unsafe')
+            np.bitwise_and(dst, 0x0F00, out=dst)
+            np.right_shift(src, 3, out=other, casting='unsafe')
+            np.bitwise_and(other, 0x00F0, out=other)
+            np.bitwise_or(dst, other, out=dst)
+            np.right_shift(src, 1, out=other, casting='unsafe')
+            np.bitwise_and(other, 0x000F, out=other)
+            np.bitwise_or(dst, other, out=dst)
+            return dst
+
+        np.left_shift(src[..., 0], 4, out=dst, dtype=np.uint16)
+        np.bitwise_and(dst, 0x0F00, out=dst)
+        np.bitwise_and(src[..., 1], 0xF0, out=other, dtype=np.uint16)
+        np.bitwise_or(dst, other, out=dst)
+        np.right_shift(src[..., 2], 4, out=other, dtype=np.uint16)
+        np.bitwise_or(dst, other, out=dst)
+        return dst
+
+    def align(self, box):
+        """Get the box to send for a region
+
+        Pixels go out in pairs, so a box of odd width is widened by a
+        column; any band of its rows then holds whole pairs, and the panel
+        is never left waiting for half a pair.
+        """
+        x0, y0, x1, y1 = box
+        if (x1 - x0) % 2:
+            if x1 < self.width:
+                x1 += 1
+            else:
+                x0 -= 1
+        return (x0, y0, x1, y1)
+
+    def window(self, box):
+        """Pack the converted pixels of a box into a contiguous byte buffer
+
+        The box should come from align(); if its pixel count is odd the
+        last byte only carries half a pixel.
+        """
+        x0, y0, x1, y1 = box
+        region = self.frame[y0:y1, x0:x1]
+        count = region.size
+        pairs = (count + 1) // 2
+
+        pixels = self._pixels[:pairs * 2]
+        pixels[:count].reshape(region.shape)[...] = region
+        pixels[count:] = 0
+        first = pixels[0::2]
+        second = pixels[1::2]
+
+        # Casting to bytes keeps the low eight bits of each shift
+        packed = self._packed[:pairs * 3]
+        middle = self._middle[:pairs]
+        np.right_shift(first, 4, out=packed[0::3], casting='unsafe')
+        np.left_shift(first, 4, out=packed[1::3], casting='unsafe')
+        np.right_shift(second, 8, out=middle)
+        np.bitwise_or(packed[1::3], middle, out=packed[1::3], casting='unsafe')
+        np.copyto(packed[2::3], second, casting='unsafe')
+        if count % 2:
+            return packed[:count * 3 // 2 + 1]
+        return packed
+
+    def fill(self, value: int):
+        """Fill the whole frame with one RGB565 value and get it packed"""
+        self.frame.fill(((value >> 4) & 0x0F00) | ((value >> 3) & 0x00F0) | ((value >> 1) & 0x000F))
+        return self.window((0, 0, self.width, self.height))
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# PeTTraC RGB565 Canvas
+# Draws straight into a frame in the panel's pixel format
+
+import functools
+import numpy as np
+from typing import Optional, Tuple
+from PIL import Image, ImageColor
+
+Box = Tuple[int, int, int, int]
+
+@functools.lru_cache(maxsize=256)
+def _parse(color: str):
+    """Parse a colour name or hex string once"""
+    return ImageColor.getrgb(color)
+
+def pack_color(color) -> int:
+    """Get the RGB565 value of a colour name, RGB(A) tuple or RGB565 int"""
+    if isinstance(color, int):
+        return color
+    if isinstance(color, str):
+        color = _parse(color)
+    r, g, b = color[:3]
+    return ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
+
+def pack_rgb565(rgb) -> np.ndarray:
+    """Pack an (height, width, 3) uint8 array into big-endian RGB565"""
+    rgb = rgb.astype(np.uint16)
+    packed = (rgb[..., 0] & 0xF8) << 8
+    packed |= (rgb[..., 1] & 0xFC) << 3
+    packed |= rgb[..., 2] >> 3
+    return packed.astype('>u2')
+
+def unpack_rgb565(frame) -> np.ndarray:
+    """Expand RGB565 pixels to an (height, width, 3) uint8 array
+
+    The low bits are filled from the high ones, so packing the result again
+    gives back exactly the same pixels.
+    """
+    frame = frame.astype(np.uint16)
+    rgb = np.empty(frame.shape + (3,), dtype=np.uint8)
+    r = frame >> 11
+    g = (frame >> 5) & 0x3F
+    b = frame & 0x1F
+    rgb[..., 0] = (r << 3) | (r >> 2)
+    rgb[..., 1] = (g << 2) | (g >> 4)
+    rgb[..., 2] = (b << 3) | (b >> 2)
+    return rgb
+
+def _clip(box: Box, width: int, height: int) -> Optional[Box]:
+    """Clip a box to an image, or None if nothing is left"""
+    x0, y0 = max(0, box[0]), max(0, box[1])
+    x1, y1 = min(width, box[2]), min(height, box[3])
+    if x0 < x1 and y0 < y1:
+        return (x0, y0, x1, y1)
+    return None
+
+class RGB565Image:
+    """A frame held as a big-endian RGB565 NumPy array
+
+    This is the layout the panel takes over SPI, so frames drawn here go to
+    the display without a colour conversion. Only the parts of the PIL
+    Image interface the UI uses are provided (size, copy, crop, paste), so
+    it can stand in for an "RGB" image as the render target.
+    """
+
+    def __init__(self, size: Tuple[int, int], color=0, frame: Optional[np.ndarray] = None):
+        self.size = size
+        self.width, self.height = size
+        if frame is None:
+            frame = np.empty((self.height, self.width), dtype='>u2')
+            frame.fill(pack_color(color))
+        self.frame = frame
+
+    def __array__(self, dtype=None, copy=None):
+        return self.frame if dtype is None else self.frame.astype(dtype)
+
+    def copy(self) -> "RGB565Image":
+        """Get an independent copy"""
+        return RGB565Image(self.size, frame=self.frame.copy())
+
+    def crop(self, box: Box) -> "RGB565Image":
+        """Get a copy of an area"""
+        x0, y0, x1, y1 = box
+        return RGB565Image((x1 - x0, y1 - y0), frame=self.frame[y0:y1, x0:x1].copy())
+
+    def paste(self, im, box=None):
+        """Paste an image or fill an area with a colour, like Image.paste
+
+        im is an RGB565Image, a PIL image (converted on the way in) or a
+        colour. box is an upper left corner or a full (x0, y0, x1, y1) box.
+        """
+        if box is None:
+            box = (0, 0)
+
+        if not isinstance(im, (RGB565Image, Image.Image)):
+            if len(box) == 2:
+                box = (box[0], box[1], self.width, self.height)
+            area = _clip(box, self.width, self.height)
+            if area:
+                x0, y0, x1, y1 = area
+                self.frame[y0:y1, x0:x1] = pack_color(im)
+            return
+
+        x, y = box[:2]
+        area = _clip((x, y, x + im.width, y + im.height), self.width, self.height)
+        if area is None:
+            return
+        x0, y0, x1, y1 = area
+        if isinstance(im, RGB565Image):
+            source = im.frame[y0 - y:y1 - y, x0 - x:x1 - x]
+        else:
+            source = pack_rgb565(np.asarray(im.convert("RGB"))[y0 - y:y1 - y, x0 - x:x1 - x])
+        self.frame[y0:y1, x0:x1] = source
+
+class RGB565Draw:
+    """Drawing primitives for an RGB565Image
+
+    Offers the ImageDraw methods the widgets use (rectangle and bitmap),
+    each done as a few NumPy slice operations on the frame, plus the
+    underlying fill_rect, hline, vline and blit.
+    """
+
+    def __init__(self, image: RGB565Image):
+        # Named like ImageDraw's attribute, which widgets paste through
+        self._image = image
+        self.frame = image.frame
+
+    def fill_rect(self, box: Box, color):
+        """Fill an (x0, y0, x1, y1) box with exclusive end"""
+        area = _clip(box, self._image.width, self._image.height)
+        if area:
+            x0, y0, x1, y1 = area
+            self.frame[y0:y1, x0:x1] = pack_color(color)
+
+    def hline(self, x0: int, x1: int, y: int, color):
+        """Draw a horizontal line from x0 to x1 inclusive"""
+        self.fill_rect((x0, y, x1 + 1, y + 1), color)
+
+    def vline(self, x: int, y0: int, y1: int, color):
+        """Draw a vertical line from y0 to y1 inclusive"""
+        self.fill_rect((x, y0, x + 1, y1 + 1), color)
+
+    def blit(self, image, xy: Tuple[int, int]):
+        """Copy an image onto the frame"""
+        self._image.paste(image, xy)
+
+    def rectangle(self, xy, fill=None, outline=None, width: int = 1):
+        """Draw a rectangle with inclusive corners, like ImageDraw.rectangle
+
+        An outline at least as wide as the box is kept inside it, where PIL
+        draws past its left or bottom edge.
+        """
+        x0, y0, x1, y1 = (int(v) for v in xy)
+        if fill is not None:
+            self.fill_rect((x0, y0, x1 + 1, y1 + 1), fill)
+        if outline is not None and width > 0:
+            self.fill_rect((x0, y0, x1 + 1, y0 + width), outline)
+            self.fill_rect((x0, y1 - width + 1, x1 + 1, y1 + 1), outline)
+            self.fill_rect((x0, y0 + width, x0 + width, y1 - width + 1), outline)
+            self.fill_rect((x1 - width + 1, y0 + width, x1 + 1, y1 - width + 1), outline)
+
+    def bitmap(self, xy, bitmap: Image.Image, fill=None):
+        """Blend a fill colour through a mask, like ImageDraw.bitmap
+
+        Coverage is blended with the same rounding as PIL, on the pixels as
+        stored in RGB565, so edges can differ from the RGB path by one step.
+        """
+        x, y = int(xy[0]), int(xy[1])
+        area = _clip((x, y, x + bitmap.width, y + bitmap.height), self._image.width, self._image.height)
+        if area is None or fill is None:
+            return
+        x0, y0, x1, y1 = area
+
+        mask = np.asarray(bitmap)[y0 - y:y1 - y, x0 - x:x1 - x]
+        if mask.dtype == bool:
+            mask = mask.astype(np.uint8) * 255
+        mask = mask.astype(np.int32)[..., None]
+
+        if isinstance(fill, int):
+            color = unpack_rgb565(np.array([[fill]], dtype=np.uint16))[0, 0]
+        else:
+            color = _parse(fill) if isinstance(fill, str) else fill
+        color = np.array(color[:3], dtype=np.int32)
+
+        # Same as PIL: (dst * (255 - a) + fill * a) / 255, rounded
+        region = self.frame[y0:y1, x0:x1]
+        tmp = unpack_rgb565(region).astype(np.int32) * (255 - mask) + color * mask + 128
+        region[...] = pack_rgb565((((tmp >> 8) + tmp) >> 8).astype(np.uint8))
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# PeTTraC Screen Manager
+# Keeps a bounded set of built screens and preloads likely next ones
+
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from ui_framework import Screen
+from screens import SCREENS, get_screen
+
+# Screens the user is likely to open next from each screen, most likely first
+PRELOAD: Dict[str, List[str]] = {
+    "desktop": ["menu"],
+    "menu": ["system_info", "battery", "settings", "about"],
+    "system_info": ["menu"],
+    "battery": ["menu"],
+    "settings": ["menu"],
+    "about": ["menu"],
+}
+
+class ScreenManager:
+    """Builds screens on demand and keeps the most recently used ones
+
+    At most max_screens screens are kept. When another one is needed the
+    least recently used screen is destroyed so nothing refers to it any
+    more. The current screen is never evicted.
+    """
+
+    def __init__(self, max_screens: int = 4, preload: bool = True):
+        self.max_screens = max(1, max_screens)
+        self.preload = preload
+        self.screens: "OrderedDict[str, Screen]" = OrderedDict()
+        self.current_name: Optional[str] = None
+
+    @property
+    def current(self) -> Optional[Screen]:
+        """The screen being shown"""
+        return self.screens.get(self.current_name)
+
+    def get(self, name: str) -> Screen:
+        """Get a screen, building it if it is not cached"""
+        if name in self.screens:
+            self.screens.move_to_end(name)
+        else:
+            self.screens[name] = self._build(name)
+            self._evict(keep=name)
+        return self.screens[name]
+
+    def show(self, name: str) -> Screen:
+        """Make a screen the current one, deactivating the previous one"""
+        previous = self.current
+        if previous:
+            previous.deactivate()
+
+        self.current_name = name
+        screen = self.get(name)
+        screen.activate()
+        return screen
+
+    def preload_next(self) -> bool:
+        """Build one screen likely to be opened next from the current one
+
+        Meant to be called while the main loop is idle. Nothing is built
+        (and nothing evicted) once the cache is full. Returns True if a
+        screen was built.
+        """
+        if not self.preload or len(self.screens) >= self.max_screens:
+            return False
+
+        for name in PRELOAD.get(self.current_name, []):
+            if name not in self.screens and name in SCREENS:
+                self.screens[name] = self._build(name)
+                # Unused preloads are the first to go
+                self.screens.move_to_end(name, last=False)
+                logging.debug(f"Preloaded screen: {name}")
+                return True
+        return False
+
+    def clear(self):
+        """Destroy every cached screen"""
+        for screen in self.screens.values():
+            screen.destroy()
+        self.screens.clear()
+        self.current_name = None
+
+    def _build(self, name: str) -> Screen:
+        """Construct a screen"""
+        return get_screen(name)
+
+    def _evict(self, keep: str):
+        """Destroy least recently used screens until within the limit"""
+        while len(self.screens) > self.max_screens:
+            for name in self.screens:
+                if name not in (keep, self.current_name):
+                    break
+            else:
+                return
+            screen = self.screens.pop(name)
+            screen.destroy()
+            logging.debug(f"Evicted screen: {name}")
@@ -7,9 +7,10 @@ import time
 from typing import List, Dict, Any, Optional, Callable
 from datetime import datetime
 
-from ui_framework import Screen, Container, Label, Button, ProgressBar, Rect, Point
+from ui_framework import Screen, Container, Grid, Label, Button, ProgressBar, BatteryGauge, Sparkline, ListView, Rect, Point
 from ui_framework import get_theme_manager
 from state_manager import get_app_state
+from config import get_config
 from event_system import get_event_bus, Event, EventTypes
 import fonts
 
@@ -30,8 +31,8 @@ class DesktopScreen(Screen):
         # Create UI components
         self.setup_ui()
         
-        # Subscribe to events
-        self.event_bus.subscribe(EventTypes.BUTTON_PRESS, self._on_button_press)
+        # Button presses are routed here while the screen is active
+        self.add_input_handler(EventTypes.BUTTON_PRESS, self._on_button_press)
     
     def setup_ui(self):
         """Set up UI components"""
@@ -53,13 +54,16 @@ class DesktopScreen(Screen):
         
         # Battery info
         self.battery_label = Label(
-            Rect(SCREEN_WIDTH - 50, 10, 50, 20),
+            Rect(SCREEN_WIDTH - 92, 10, 52, 20),
             "N/A",
             font_size="small",
             align="right"
         )
         self.add_child(self.battery_label)
         
+        self.battery_gauge = BatteryGauge(Rect(SCREEN_WIDTH - 36, 11, 28, 14))
+        self.add_child(self.battery_gauge)
+        
         # System stats
         self.cpu_label = Label(
             Rect(10, 60, 100, 16),
@@ -85,21 +89,24 @@ class DesktopScreen(Screen):
             Rect(10, SCREEN_HEIGHT - 20, SCREEN_WIDTH - 20, 20),
             "KEY1: Menu | KEY2: Bright | KEY3: Theme",
             font_size="small",
-            color=self.theme_manager.get_color("highlight")
+            color=self.theme_manager.get_color("highlight"),
+            cached=True
         )
         self.add_child(self.hint_label)
         
         # Observe state changes
-        self.app_state.current_time.observe(self._on_time_change)
-        self.app_state.battery_percentage.observe(self._on_battery_change)
-        self.app_state.is_charging.observe(self._on_charging_change)
-        self.app_state.cpu_usage.observe(self._on_cpu_change)
-        self.app_state.memory_usage.observe(self._on_memory_change)
+        self.observe(self.app_state.current_time, self._on_time_change)
+        self.observe(self.app_state.battery_percentage, self._on_battery_change)
+        self.observe(self.app_state.is_charging, self._on_charging_change)
+        self.observe(self.app_state.cpu_usage, self._on_cpu_change)
+        self.observe(self.app_state.memory_usage, self._on_memory_change)
     
     def create_app_grid(self):
         """Create app grid with buttons"""
-        self.app_container = Container(
-            Rect(20, 100, 200, 110)
+        self.app_container = Grid(
+            Rect(30, 100, 95, 95),
+            columns=2,
+            spacing=15
         )
         self.add_child(self.app_container)
         
@@ -111,22 +118,14 @@ class DesktopScreen(Screen):
             {"name": "Settings", "color": self.theme_manager.get_color("text"), "action": self._settings_action}
         ]
         
-        grid_x = 10
-        grid_y = 0
-        spacing = 55
-        
-        for i, icon in enumerate(app_icons):
-            col = i % 2
-            row = i // 2
-            
-            x = grid_x + col * spacing
-            y = grid_y + row * spacing
-            
+        for icon in app_icons:
+            # Placed and sized by the grid
             button = Button(
-                Rect(x, y, 40, 40),
+                Rect(0, 0, 0, 0),
                 icon["name"],
                 action=icon["action"],
-                bg_color=icon["color"]
+                bg_color=icon["color"],
+                cached=True
             )
             self.app_container.add_child(button)
     
@@ -164,6 +163,7 @@ class DesktopScreen(Screen):
                 
             self.battery_label.color = color
             self.battery_label.set_text(f"{percentage}%")
+            self.battery_gauge.set_percentage(percentage)
     
     def _on_charging_change(self, is_charging):
         """Handle charging state change"""
@@ -214,6 +214,8 @@ class DesktopScreen(Screen):
     
     def activate(self):
         """Called when screen becomes active"""
+        super().activate()
+        
         # Make sure theme is correct
         self.hint_label.color = self.theme_manager.get_color("highlight")
         self.cpu_label.color = self.theme_manager.get_color("accent1")
@@ -221,7 +223,7 @@ class DesktopScreen(Screen):
     
     def deactivate(self):
         """Called when screen is no longer active"""
-        pass
+        super().deactivate()
 
 
 class MenuScreen(Screen):
@@ -234,15 +236,14 @@ class MenuScreen(Screen):
         self.theme_manager = get_theme_manager()
         self.event_bus = get_event_bus()
         
-        # Menu options and current selection
+        # Menu options
         self.menu_items = ["System Info", "Battery", "Settings", "About"]
-        self.selected_item = 0
         
         # Create UI components
         self.setup_ui()
         
-        # Subscribe to events
-        self.event_bus.subscribe(EventTypes.BUTTON_PRESS, self._on_button_press)
+        # Button presses are routed here while the screen is active
+        self.add_input_handler(EventTypes.BUTTON_PRESS, self._on_button_press)
     
     def setup_ui(self):
         """Set up UI components"""
@@ -259,48 +260,32 @@ class MenuScreen(Screen):
             font_type="bold",
             font_size="large",
             color=self.theme_manager.get_color("menu_item"),
-            align="center"
+            align="center",
+            cached=True
         )
-        self.add_child(title_label)
+        header_bg.add_child(title_label)
         
-        # Menu items
-        self.menu_container = Container(
-            Rect(10, 40, SCREEN_WIDTH - 20, 160)
+        # Menu items; the list handles up/down/press itself
+        self.menu_list = ListView(
+            Rect(10, 40, SCREEN_WIDTH - 20, 160),
+            len(self.menu_items),
+            lambda i: self.menu_items[i],
+            row_height=30,
+            spacing=10,
+            on_select=self._on_menu_select
         )
-        self.add_child(self.menu_container)
-        
-        # Create menu buttons
-        self.menu_buttons = []
-        for i, item in enumerate(self.menu_items):
-            btn = Button(
-                Rect(0, i * 40, SCREEN_WIDTH - 20, 30),
-                item,
-                action=lambda idx=i: self._on_menu_select(idx),
-                bg_color=self.theme_manager.get_color("menu_selected_bg") if i == self.selected_item else None,
-                text_color=self.theme_manager.get_color("menu_selected_text") if i == self.selected_item else self.theme_manager.get_color("menu_item")
-            )
-            self.menu_container.add_child(btn)
-            self.menu_buttons.append(btn)
+        self.add_child(self.menu_list)
         
         # Navigation hint
         hint_label = Label(
             Rect(10, SCREEN_HEIGHT - 20, SCREEN_WIDTH - 20, 20),
             "◀ Back    ▲▼ Navigate    ● Select",
             font_size="small",
-            color=self.theme_manager.get_color("highlight")
+            color=self.theme_manager.get_color("highlight"),
+            cached=True
         )
         self.add_child(hint_label)
     
-    def update_selection(self):
-        """Update the visual selection state"""
-        for i, btn in enumerate(self.menu_buttons):
-            if i == self.selected_item:
-                btn.bg_color = self.theme_manager.get_color("menu_selected_bg")
-                btn.text_color = self.theme_manager.get_color("menu_selected_text")
-            else:
-                btn.bg_color = None
-                btn.text_color = self.theme_manager.get_color("menu_item")
-    
     def _on_menu_select(self, index):
         """Handle menu item selection"""
         selected = self.menu_items[index]
@@ -318,24 +303,17 @@ class MenuScreen(Screen):
         """Handle button press events"""
         button = event.data.get("button")
         
-        if button == "up":
-            self.selected_item = (self.selected_item - 1) % len(self.menu_items)
-            self.update_selection()
-        elif button == "down":
-            self.selected_item = (self.selected_item + 1) % len(self.menu_items)
-            self.update_selection()
-        elif button == "press":
-            self._on_menu_select(self.selected_item)
-        elif button == "left":
+        if button == "left":
             self.app_state.current_screen.value = "desktop"
         elif button == "key1":
             self.app_state.current_screen.value = "desktop"
     
     def activate(self):
         """Called when screen becomes active"""
+        super().activate()
+        
         # Update colors from theme
         self.bg_color = self.theme_manager.get_color("background")
-        self.update_selection()
         
         for child in self.children:
             if isinstance(child, Container) and child.rect.y == 0:
@@ -343,7 +321,7 @@ class MenuScreen(Screen):
     
     def deactivate(self):
         """Called when screen is no longer active"""
-        pass
+        super().deactivate()
 
 
 class SystemInfoScreen(Screen):
@@ -359,8 +337,8 @@ class SystemInfoScreen(Screen):
         # Create UI components
         self.setup_ui()
         
-        # Subscribe to events
-        self.event_bus.subscribe(EventTypes.BUTTON_PRESS, self._on_button_press)
+        # Button presses are routed here while the screen is active
+        self.add_input_handler(EventTypes.BUTTON_PRESS, self._on_button_press)
     
     def setup_ui(self):
         """Set up UI components"""
@@ -377,25 +355,34 @@ class SystemInfoScreen(Screen):
             font_type="bold",
             font_size="large",
             color=self.theme_manager.get_color("background"),
-            align="center"
+            align="center",
+            cached=True
         )
-        self.add_child(title_label)
+        header_bg.add_child(title_label)
         
         # CPU usage
         self.cpu_label = Label(
-            Rect(10, 40, SCREEN_WIDTH - 20, 20),
+            Rect(10, 40, 145, 20),
             "CPU Usage: 0%",
             color=self.theme_manager.get_color("text")
         )
         self.add_child(self.cpu_label)
         
         self.cpu_bar = ProgressBar(
-            Rect(10, 65, SCREEN_WIDTH - 20, 10),
+            Rect(10, 65, 140, 10),
             value=0,
-            color=self.theme_manager.get_color("error")
+            fill_color=self.theme_manager.get_color("error")
         )
         self.add_child(self.cpu_bar)
         
+        # Recent CPU trend
+        self.cpu_chart = Sparkline(
+            Rect(160, 40, 70, 36),
+            self.app_state.cpu_history,
+            line_color=self.theme_manager.get_color("error")
+        )
+        self.add_child(self.cpu_chart)
+        
         # Memory usage
         self.memory_label = Label(
             Rect(10, 90, SCREEN_WIDTH - 20, 20),
@@ -407,7 +394,7 @@ class SystemInfoScreen(Screen):
         self.memory_bar = ProgressBar(
             Rect(10, 115, SCREEN_WIDTH - 20, 10),
             value=0,
-            color=self.theme_manager.get_color("highlight")
+            fill_color=self.theme_manager.get_color("highlight")
         )
         self.add_child(self.memory_bar)
         
@@ -422,32 +409,43 @@ class SystemInfoScreen(Screen):
         self.disk_bar = ProgressBar(
             Rect(10, 165, SCREEN_WIDTH - 20, 10),
             value=0,
-            color=self.theme_manager.get_color("accent2")
+            fill_color=self.theme_manager.get_color("accent2")
         )
         self.add_child(self.disk_bar)
         
         # Temperature
         self.temp_label = Label(
-            Rect(10, 190, SCREEN_WIDTH - 20, 20),
-            "Temperature: 0.0°C",
+            Rect(10, 190, 145, 20),
+            "Temp: 0.0°C",
             color=self.theme_manager.get_color("text")
         )
         self.add_child(self.temp_label)
         
+        # Recent temperature trend
+        self.temp_chart = Sparkline(
+            Rect(160, 188, 70, 22),
+            self.app_state.temperature_history,
+            min_value=30,
+            max_value=85,
+            line_color=self.theme_manager.get_color("warning")
+        )
+        self.add_child(self.temp_chart)
+        
         # Navigation hint
         hint_label = Label(
             Rect(10, SCREEN_HEIGHT - 20, SCREEN_WIDTH - 20, 20),
             "◀ Back",
             font_size="small",
-            color=self.theme_manager.get_color("highlight")
+            color=self.theme_manager.get_color("highlight"),
+            cached=True
         )
         self.add_child(hint_label)
         
         # Observe state changes
-        self.app_state.cpu_usage.observe(self._on_cpu_change)
-        self.app_state.memory_usage.observe(self._on_memory_change)
-        self.app_state.disk_usage.observe(self._on_disk_change)
-        self.app_state.temperature.observe(self._on_temperature_change)
+        self.observe(self.app_state.cpu_usage, self._on_cpu_change)
+        self.observe(self.app_state.memory_usage, self._on_memory_change)
+        self.observe(self.app_state.disk_usage, self._on_disk_change)
+        self.observe(self.app_state.temperature, self._on_temperature_change)
     
     def _on_cpu_change(self, cpu_usage):
         """Handle CPU usage change"""
@@ -466,7 +464,7 @@ class SystemInfoScreen(Screen):
     
     def _on_temperature_change(self, temperature):
         """Handle temperature change"""
-        self.temp_label.set_text(f"Temperature: {temperature:.1f}°C")
+        self.temp_label.set_text(f"Temp: {temperature:.1f}°C")
     
     def _on_button_press(self, event: Event):
         """Handle button press events"""
@@ -477,15 +475,17 @@ class SystemInfoScreen(Screen):
     
     def update(self):
         """Update screen state"""
-        pass
+        # Scroll the charts when new samples arrive
+        self.cpu_chart.update()
+        self.temp_chart.update()
     
     def activate(self):
         """Called when screen becomes active"""
-        pass
+        super().activate()
     
     def deactivate(self):
         """Called when screen is no longer active"""
-        pass
+        super().deactivate()
 
 
 class BatteryScreen(Screen):
@@ -501,8 +501,8 @@ class BatteryScreen(Screen):
         # Create UI components
         self.setup_ui()
         
-        # Subscribe to events
-        self.event_bus.subscribe(EventTypes.BUTTON_PRESS, self._on_button_press)
+        # Button presses are routed here while the screen is active
+        self.add_input_handler(EventTypes.BUTTON_PRESS, self._on_button_press)
     
     def setup_ui(self):
         """Set up UI components"""
@@ -519,13 +519,14 @@ class BatteryScreen(Screen):
             font_type="bold",
             font_size="large",
             color=self.theme_manager.get_color("background"),
-            align="center"
+            align="center",
+            cached=True
         )
-        self.add_child(title_label)
+        header_bg.add_child(title_label)
         
         # Large percentage display
         self.percentage_label = Label(
-            Rect(0, 60, SCREEN_WIDTH, 30),
+            Rect(0, 40, SCREEN_WIDTH, 30),
             "0%",
             font_type="bold",
             font_size="large",
@@ -534,15 +535,13 @@ class BatteryScreen(Screen):
         )
         self.add_child(self.percentage_label)
         
-        # Battery container (for custom drawing)
-        self.battery_container = Container(
-            Rect(70, 90, 100, 50)
-        )
-        self.add_child(self.battery_container)
+        # Battery gauge
+        self.battery_gauge = BatteryGauge(Rect(85, 75, 70, 30))
+        self.add_child(self.battery_gauge)
         
         # Charging indicator
         self.charging_label = Label(
-            Rect(0, 100, SCREEN_WIDTH, 20),
+            Rect(0, 112, SCREEN_WIDTH, 20),
             "⚡ Charging",
             color=self.theme_manager.get_color("warning"),
             align="center"
@@ -587,45 +586,21 @@ class BatteryScreen(Screen):
             Rect(10, SCREEN_HEIGHT - 20, SCREEN_WIDTH - 20, 20),
             "◀ Back",
             font_size="small",
-            color=self.theme_manager.get_color("highlight")
+            color=self.theme_manager.get_color("highlight"),
+            cached=True
         )
         self.add_child(hint_label)
         
         # Observe state changes
-        self.app_state.battery_percentage.observe(self._on_battery_change)
-        self.app_state.battery_voltage.observe(self._on_voltage_change)
-        self.app_state.is_charging.observe(self._on_charging_change)
+        self.observe(self.app_state.battery_percentage, self._on_battery_change)
+        self.observe(self.app_state.battery_voltage, self._on_voltage_change)
+        self.observe(self.app_state.is_charging, self._on_charging_change)
     
     def _on_battery_change(self, percentage):
         """Handle battery percentage change"""
         if percentage is not None:
             self.percentage_label.set_text(f"{percentage}%")
-            
-            # Update battery_container's custom draw method
-            def draw_battery(canvas, rect):
-                x, y = rect.x, rect.y
-                width, height = 50, 25
-                
-                # Set color based on battery level
-                if percentage > 75:
-                    fill_color = self.theme_manager.get_color("accent2")
-                elif percentage > 30:
-                    fill_color = self.theme_manager.get_color("warning")
-                else:
-                    fill_color = self.theme_manager.get_color("error")
-                
-                # Draw battery outline
-                canvas.rectangle((x, y, x + width, y + height), 
-                               outline=self.theme_manager.get_color("text"), width=2)
-                canvas.rectangle((x + width, y + 7, x + width + 5, y + height - 7), 
-                               fill=self.theme_manager.get_color("text"))
-                
-                # Draw battery fill level
-                fill_width = int((percentage / 100) * (width - 4))
-                canvas.rectangle((x + 2, y + 2, x + 2 + fill_width, y + height - 2), 
-                               fill=fill_color)
-            
-            self.battery_container.custom_draw = draw_battery
+            self.battery_gauge.set_percentage(percentage)
     
     def _on_voltage_change(self, voltage):
         """Handle voltage change"""
@@ -649,11 +624,11 @@ class BatteryScreen(Screen):
     
     def activate(self):
         """Called when screen becomes active"""
-        pass
+        super().activate()
     
     def deactivate(self):
         """Called when screen is no longer active"""
-        pass
+        super().deactivate()
 
 
 class SettingsScreen(Screen):
@@ -680,8 +655,8 @@ class SettingsScreen(Screen):
         # Create UI components
         self.setup_ui()
         
-        # Subscribe to events
-        self.event_bus.subscribe(EventTypes.BUTTON_PRESS, self._on_button_press)
+        # Button presses are routed here while the screen is active
+        self.add_input_handler(EventTypes.BUTTON_PRESS, self._on_button_press)
     
     def setup_ui(self):
         """Set up UI components"""
@@ -698,9 +673,10 @@ class SettingsScreen(Screen):
             font_type="bold",
             font_size="large",
             color=self.theme_manager.get_color("text"),
-            align="center"
+            align="center",
+            cached=True
         )
-        self.add_child(title_label)
+        header_bg.add_child(title_label)
         
         # Settings container
         self.settings_container = Container(
@@ -738,7 +714,7 @@ class SettingsScreen(Screen):
         
         # Highlight for selected item
         self.selection_highlight = Container(
-            Rect(5, 35 + (self.selected_item * 35), SCREEN_WIDTH - 10, 30),
+            Rect(0, self.selected_item * 35 - 5, SCREEN_WIDTH - 10, 30),
             bg_color=self.theme_manager.get_color("menu_selected_bg")
         )
         self.settings_container.add_child(self.selection_highlight)
@@ -751,14 +727,17 @@ class SettingsScreen(Screen):
             Rect(10, SCREEN_HEIGHT - 20, SCREEN_WIDTH - 20, 20),
             "◀ Back    ◀▶ Change Value    ● Select",
             font_size="small",
-            color=self.theme_manager.get_color("highlight")
+            color=self.theme_manager.get_color("highlight"),
+            cached=True
         )
         self.add_child(self.hint_label)
     
     def update_selection(self):
         """Update the visual selection state"""
         # Move highlight
-        self.selection_highlight.rect.y = 35 + (self.selected_item * 35)
+        self.selection_highlight.set_rect(
+            Rect(0, self.selected_item * 35 - 5, SCREEN_WIDTH - 10, 30)
+        )
         
         # Update value text and arrows
         for i, label in enumerate(self.value_labels):
@@ -857,6 +836,8 @@ class SettingsScreen(Screen):
     
     def activate(self):
         """Called when screen becomes active"""
+        super().activate()
+        
         # Refresh settings values from app state
         self.settings[0]["value"] = self.app_state.brightness.value
         self.settings[1]["value"] = self.config.get("display", "rotation")
@@ -874,7 +855,7 @@ class SettingsScreen(Screen):
     
     def deactivate(self):
         """Called when screen is no longer active"""
-        pass
+        super().deactivate()
 
 
 class AboutScreen(Screen):
@@ -890,8 +871,8 @@ class AboutScreen(Screen):
         # Create UI components
         self.setup_ui()
         
-        # Subscribe to events
-        self.event_bus.subscribe(EventTypes.BUTTON_PRESS, self._on_button_press)
+        # Button presses are routed here while the screen is active
+        self.add_input_handler(EventTypes.BUTTON_PRESS, self._on_button_press)
     
     def setup_ui(self):
         """Set up UI components"""
@@ -911,9 +892,10 @@ class AboutScreen(Screen):
             font_type="bold",
             font_size="large",
             color=self.theme_manager.get_color("background"),
-            align="center"
+            align="center",
+            cached=True
         )
-        self.add_child(title_label)
+        header_bg.add_child(title_label)
         
         # App information
         app_name_label = Label(
@@ -984,7 +966,8 @@ class AboutScreen(Screen):
             Rect(10, SCREEN_HEIGHT - 20, SCREEN_WIDTH - 20, 20),
             "◀ Back",
             font_size="small",
-            color=self.theme_manager.get_color("highlight")
+            color=self.theme_manager.get_color("highlight"),
+            cached=True
         )
         self.add_child(hint_label)
     
@@ -1001,6 +984,8 @@ class AboutScreen(Screen):
     
     def activate(self):
         """Called when screen becomes active"""
+        super().activate()
+        
         # Update colors from theme
         theme = self.theme_manager.get_current_theme()
         title_color = {"default": "PURPLE", "dark": "PURPLE", "light": "PURPLE", "blue": "CYAN"}.get(theme, "PURPLE")
@@ -1013,7 +998,7 @@ class AboutScreen(Screen):
     
     def deactivate(self):
         """Called when screen is no longer active"""
-        pass
+        super().deactivate()
 
 
 # Dictionary of available screens
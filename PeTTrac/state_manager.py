@@ -4,15 +4,22 @@
 
 import logging
 import time
-from typing import Dict, Any, Callable, List, Optional, Set, TypeVar, Generic
+import numpy as np
+from typing import Dict, Any, Callable, List, Optional, Set, Tuple, TypeVar, Generic
 from datetime import datetime
 from event_system import get_event_bus, Event, EventTypes
 
 T = TypeVar('T')
 
+# Samples kept for each history (a few minutes at one read per second)
+HISTORY_SAMPLES = 240
+
 class Observable(Generic[T]):
     """An observable property that notifies observers when its value changes"""
     
+    # Total number of value changes across all observables
+    change_count = 0
+    
     def __init__(self, initial_value: T):
         self._value = initial_value
         self._observers: List[Callable[[T], None]] = []
@@ -28,6 +35,7 @@ class Observable(Generic[T]):
         if new_value != self._value:
             old_value = self._value
             self._value = new_value
+            Observable.change_count += 1
             self._notify_observers(old_value, new_value)
     
     def observe(self, callback: Callable[[T], None]):
@@ -49,6 +57,36 @@ class Observable(Generic[T]):
                 logging.error(f"Error in observer: {e}")
 
 
+class History:
+    """Fixed-size ring buffer of recent samples
+    
+    Appending overwrites the oldest sample in place, so recording history
+    never allocates. count keeps growing with every sample, which lets
+    readers tell how many arrived since they last looked.
+    """
+    
+    def __init__(self, size: int):
+        self.size = size
+        self._samples = np.zeros(size, dtype=np.float32)
+        self.count = 0
+    
+    def append(self, value: float):
+        """Record a sample"""
+        self._samples[self.count % self.size] = value
+        self.count += 1
+    
+    def last(self, n: int) -> Tuple[np.ndarray, ...]:
+        """Get up to the last n samples, oldest first
+        
+        The samples are returned as one or two views into the ring buffer
+        rather than a copy, so they are only valid until the next append.
+        """
+        n = min(n, self.count, self.size)
+        end = self.count % self.size
+        if n <= end:
+            return (self._samples[end - n:end],)
+        return (self._samples[end - n:], self._samples[:end])
+
 class AppState:
     """Centralized application state"""
     
@@ -80,12 +118,22 @@ class AppState:
         self.disk_usage = Observable(0)
         self.temperature = Observable(0)
         
+        # Recent samples for trend charts, one per stats read
+        self.cpu_history = History(HISTORY_SAMPLES)
+        self.temperature_history = History(HISTORY_SAMPLES)
+        
         # Settings
         self.brightness = Observable(50)
         self.brightness.observe(self._on_brightness_change)
         
-        # Current time
-        self.current_time = Observable(datetime.now())
+        # Current time (to the second, so it changes once per second)
+        self.current_time = Observable(datetime.now().replace(microsecond=0))
+        
+        # Frame rate the main loop is currently aiming for
+        self.target_fps = Observable(20.0)
+        
+        # Display power state (rendering is suspended while asleep)
+        self.display_asleep = Observable(False)
         
         # Debug info
         self.start_time = time.time()
@@ -116,18 +164,20 @@ class AppState:
         """Update time-based state"""
         current_time = time.time()
         self.last_update_time = current_time
-        self.current_time.value = datetime.now()
+        self.current_time.value = datetime.now().replace(microsecond=0)
     
     def update_system_stats(self, stats: Dict[str, Any]):
         """Update system statistics"""
         if "cpu" in stats:
             self.cpu_usage.value = stats["cpu"]
+            self.cpu_history.append(stats["cpu"])
         if "memory" in stats:
             self.memory_usage.value = stats["memory"]
         if "disk" in stats:
             self.disk_usage.value = stats["disk"]
         if "temperature" in stats:
             self.temperature.value = stats["temperature"]
+            self.temperature_history.append(stats["temperature"])
     
     def update_battery_status(self, percentage: Optional[int], voltage: Optional[int], charging: bool):
         """Update battery status"""
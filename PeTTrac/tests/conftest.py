@@ -0,0 +1,45 @@
+# PeTTraC test configuration
+# Puts the flat PeTTraC modules on the path and replaces the hardware
+# libraries the display driver imports with stand-ins
+
+import copy
+import os
+import sys
+import types
+
+import pytest
+
+from panel_model import FakeSpiDev, FakePin
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_FILE = os.path.join(PACKAGE_DIR, "config.json")
+sys.path.insert(0, PACKAGE_DIR)
+
+# Tests never drive real pins or the SPI bus
+sys.modules["spidev"] = types.SimpleNamespace(SpiDev=FakeSpiDev)
+sys.modules["gpiozero"] = types.SimpleNamespace(
+    DigitalInputDevice=FakePin, DigitalOutputDevice=FakePin, PWMOutputDevice=FakePin
+)
+
+# System stats are never read by the tests
+try:
+    import psutil  # noqa: F401
+except ImportError:
+    sys.modules["psutil"] = types.ModuleType("psutil")
+
+_config_existed = os.path.exists(CONFIG_FILE)
+
+import config as config_module  # noqa: E402
+
+@pytest.fixture(autouse=True)
+def default_config(monkeypatch):
+    """Run every test with the default configuration, without saving it"""
+    config = config_module.get_config()
+    monkeypatch.setattr(config, "config", copy.deepcopy(config_module.DEFAULT_CONFIG))
+    monkeypatch.setattr(config, "_save_config", lambda config=None: True)
+    return config
+
+def pytest_sessionfinish(session, exitstatus):
+    # Loading the configuration writes a default file if there is none
+    if not _config_existed and os.path.exists(CONFIG_FILE):
+        os.remove(CONFIG_FILE)
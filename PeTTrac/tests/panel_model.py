@@ -0,0 +1,178 @@
+# PeTTraC test helpers
+# Stand-ins for the SPI bus and GPIO pins, and a model of the ST7789 that
+# decodes the byte stream the driver sends
+
+import numpy as np
+
+class FakeSpiDev:
+    """spidev.SpiDev that hands every transfer to a sink"""
+
+    def __init__(self, *args):
+        self.max_speed_hz = 0
+        self.mode = 0
+        self.sink = None
+
+    def writebytes(self, data):
+        self._send(bytes(data))
+
+    def writebytes2(self, data):
+        self._send(memoryview(data).cast("B").tobytes())
+
+    def _send(self, data):
+        if self.sink:
+            self.sink(data)
+
+    def close(self):
+        pass
+
+class FakePin:
+    """gpiozero output, input or PWM device"""
+
+    def __init__(self, pin=None, *args, **kwargs):
+        self.pin = pin
+        self.value = kwargs.get("initial_value", 0)
+        self.frequency = kwargs.get("frequency")
+        self.when_activated = None
+
+    def on(self):
+        self.value = 1
+
+    def off(self):
+        self.value = 0
+
+    def close(self):
+        pass
+
+class PanelModel:
+    """An ST7789 as seen from the SPI bus
+
+    Commands are told apart from data by the DC pin. CASET/RASET/RAMWR
+    writes go to the address window in the order the controller uses, and
+    MADCTL decides where each address lands in the 240 x 320 frame memory.
+    COLMOD 0x05 (16 bit) and 0x03 (12 bit) pixel data are decoded.
+    VSCRDEF and VSCSAD scroll the memory rows (gate lines) shown.
+    """
+
+    COLUMNS = 240
+    ROWS = 320
+
+    def __init__(self, display):
+        self.display = display
+        self.memory = np.zeros((self.ROWS, self.COLUMNS), dtype=np.uint16)
+        self.madctl = 0
+        self.colmod = 0x05
+        self.command = None
+        self.params = b""
+        self.window = [0, 0, self.COLUMNS - 1, self.ROWS - 1]
+        self.cursor = None
+        self.pending = b""
+        self.pixels_written = 0
+        self.scroll_area = (0, self.ROWS)  # first gate line and count
+        self.scroll_start = 0
+        display.SPI.sink = self.feed
+
+    def feed(self, data: bytes):
+        """Take one SPI transfer"""
+        if not self.display.GPIO_DC_PIN.value:
+            for command in data:
+                self.command = command
+                self.params = b""
+                self.pending = b""
+                if command == 0x2C:
+                    self.cursor = [self.window[0], self.window[1]]
+            return
+
+        if self.command == 0x2C:
+            self._write_pixels(data)
+        else:
+            self.params += data
+            self.on_params(self.command, self.params)
+
+    def on_params(self, command: int, params: bytes):
+        """Apply a command once its parameters have arrived"""
+        if command == 0x2A and len(params) == 4:
+            self.window[0] = (params[0] << 8) | params[1]
+            self.window[2] = (params[2] << 8) | params[3]
+        elif command == 0x2B and len(params) == 4:
+            self.window[1] = (params[0] << 8) | params[1]
+            self.window[3] = (params[2] << 8) | params[3]
+        elif command == 0x36 and len(params) == 1:
+            self.madctl = params[0]
+        elif command == 0x3A and len(params) == 1:
+            self.colmod = params[0]
+        elif command == 0x33 and len(params) == 6:
+            top, height, bottom = (int.from_bytes(params[i:i + 2], "big") for i in (0, 2, 4))
+            assert top + height + bottom == self.ROWS
+            self.scroll_area = (top, height)
+        elif command == 0x37 and len(params) == 2:
+            self.scroll_start = int.from_bytes(params, "big")
+
+    def _write_pixels(self, data: bytes):
+        data = self.pending + data
+        if self.colmod & 0x07 == 0x03:
+            usable = len(data) // 3 * 3
+            packed = np.frombuffer(data[:usable], dtype=np.uint8).astype(np.uint16).reshape(-1, 3)
+            values = np.empty(len(packed) * 2, dtype=np.uint16)
+            values[0::2] = (packed[:, 0] << 4) | (packed[:, 1] >> 4)
+            values[1::2] = ((packed[:, 1] & 0x0F) << 8) | packed[:, 2]
+        else:
+            usable = len(data) // 2 * 2
+            values = np.frombuffer(data[:usable], dtype='>u2')
+        self.pending = data[usable:]
+
+        x0, y0, x1, y1 = self.window
+        for value in values.tolist():
+            x, y = self.cursor
+            self.memory[self.memory_address(x, y)] = value
+            self.pixels_written += 1
+            x += 1
+            if x > x1:
+                x = x0
+                y = y0 if y >= y1 else y + 1
+            self.cursor = [x, y]
+
+    def memory_address(self, x: int, y: int):
+        """Get the (row, column) of frame memory a column/page address maps to
+
+        MV swaps the addresses, so the column address then runs along the
+        320 rows. MY reverses the order of the rows and MX that of the
+        columns, whichever address drives them.
+        """
+        if self.madctl & 0x20:
+            row, column = x, y
+        else:
+            row, column = y, x
+        if self.madctl & 0x80:
+            row = self.ROWS - 1 - row
+        if self.madctl & 0x40:
+            column = self.COLUMNS - 1 - column
+        return row, column
+
+    def shown(self) -> np.ndarray:
+        """Get frame memory as the gate lines show it
+
+        In the scroll area the first line shows the memory row set by
+        VSCSAD and the rest follow, wrapping round within the area.
+        """
+        top, height = self.scroll_area
+        rows = np.arange(self.ROWS)
+        area = rows[top:top + height]
+        area[:] = top + (area - top + self.scroll_start - top) % height
+        return self.memory[rows]
+
+    def read(self, width: int, height: int, memory=None) -> np.ndarray:
+        """Read frame memory back through the current MADCTL as an addressed image"""
+        if memory is None:
+            memory = self.memory
+        y, x = np.mgrid[0:height, 0:width]
+        return memory[self.memory_address(x, y)]
+
+def rgb565(rgb) -> np.ndarray:
+    """Pack an RGB888 array the way the driver sends it at 16 bits per pixel"""
+    rgb = rgb.astype(np.uint16)
+    return ((rgb[..., 0] & 0xF8) << 8) | ((rgb[..., 1] & 0xFC) << 3) | (rgb[..., 2] >> 3)
+
+def rgb444(rgb) -> np.ndarray:
+    """Pack an RGB888 array the way the driver sends it at 12 bits per pixel"""
+    rgb = rgb.astype(np.uint16)
+    return ((rgb[..., 0] >> 4) << 8) | ((rgb[..., 1] >> 4) << 4) | (rgb[..., 2] >> 4)
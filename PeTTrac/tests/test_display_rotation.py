@@ -0,0 +1,70 @@
+# Frames sent by the ST7789 driver land on the panel rotated as configured
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import hardware_interface
+from panel_model import FakeSpiDev, PanelModel, rgb565
+
+SIZE = 240
+ROTATIONS = (0, 90, 180, 270)
+
+# Damaged areas of different shapes, touching each edge, none overlapping
+REGIONS = [(0, 0, 17, 9), (50, 60, 51, 61), (100, 30, 163, 90), (230, 200, 240, 240), (0, 231, 40, 240)]
+
+def make_display(rotation):
+    display = hardware_interface.ST7789(spi=FakeSpiDev(), rotation=rotation)
+    panel = PanelModel(display)
+    display.Init()
+    return display, panel
+
+def random_frame(seed):
+    return np.random.default_rng(seed).integers(0, 256, (SIZE, SIZE, 3), dtype=np.uint8)
+
+def frame_image(frame):
+    return Image.fromarray(frame, "RGB")
+
+def expected(frame, rotation):
+    """The frame turned clockwise by rotation degrees, as the panel addresses it"""
+    return rgb565(np.rot90(frame, -rotation // 90))
+
+@pytest.mark.parametrize("rotation", ROTATIONS)
+def test_full_frame(rotation):
+    display, panel = make_display(rotation)
+    frame = random_frame(1)
+
+    display.ShowImage(frame_image(frame))
+
+    np.testing.assert_array_equal(panel.read(SIZE, SIZE), expected(frame, rotation))
+    assert panel.pixels_written == SIZE * SIZE
+
+@pytest.mark.parametrize("rotation", ROTATIONS)
+def test_partial_regions(rotation):
+    display, panel = make_display(rotation)
+    first = random_frame(2)
+    display.ShowImage(frame_image(first))
+
+    # Change only the damaged areas
+    second = first.copy()
+    changes = random_frame(3)
+    for x0, y0, x1, y1 in REGIONS:
+        second[y0:y1, x0:x1] = changes[y0:y1, x0:x1]
+    panel.pixels_written = 0
+
+    display.ShowImage(frame_image(second), REGIONS)
+
+    np.testing.assert_array_equal(panel.read(SIZE, SIZE), expected(second, rotation))
+    assert panel.pixels_written == sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in REGIONS)
+
+@pytest.mark.parametrize("rotation", ROTATIONS)
+def test_set_rotation(rotation):
+    display, panel = make_display(0)
+    display.ShowImage(frame_image(random_frame(4)))
+
+    display.set_rotation(rotation)
+    frame = random_frame(5)
+    display.ShowImage(frame_image(frame), REGIONS)
+
+    # The panel is reset, so the whole frame is sent again
+    np.testing.assert_array_equal(panel.read(SIZE, SIZE), expected(frame, rotation))
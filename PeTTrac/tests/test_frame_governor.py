@@ -0,0 +1,20 @@
+# Idle frames stay lined up with whole seconds
+
+import pytest
+
+import frame_governor
+from frame_governor import FrameRateGovernor
+
+@pytest.mark.parametrize("frame_time", [0.0, 0.05, 0.4])
+def test_idle_frame_wakes_after_whole_second(monkeypatch, frame_time):
+    clock = [1000.3]
+    monkeypatch.setattr(frame_governor.time, "time", lambda: clock[0])
+    governor = FrameRateGovernor(full_fps=20, idle_fps=1, input_hold=0)
+    governor.next_interval()  # publishes the rate once
+
+    # The loop starts a frame, takes frame_time over it, then sleeps
+    clock[0] = frame_start = 1001.3
+    clock[0] += frame_time
+    sleep = governor.next_interval(frame_start) - (clock[0] - frame_start)
+
+    assert clock[0] + sleep == pytest.approx(1002.01)
@@ -0,0 +1,80 @@
+# Hardware scrolling moves the right gate lines, so after sending only the
+# exposed rows the panel shows the whole frame
+
+import numpy as np
+import pytest
+
+from panel_model import rgb444, rgb565
+from test_display_rotation import SIZE, expected, frame_image, make_display, random_frame
+
+TOP, BOTTOM = 40, 200
+
+# Rows to scroll by, in both directions and past the wrap point
+STEPS = [7, 13, -5, -31, 3, 100, -1]
+
+# Changes beside the scrolled rows, one of them of odd width
+EXTRA = [(11, 50, 16, 90), (0, 220, 240, 230)]
+
+def scrolled(frame, rows, rng):
+    """Move the band up by rows and fill what scrolls in with new pixels"""
+    frame = frame.copy()
+    band = frame[TOP:BOTTOM]
+    band[:] = np.roll(band, -rows, axis=0)
+    if rows > 0:
+        exposed = (0, BOTTOM - rows, SIZE, BOTTOM)
+    else:
+        exposed = (0, TOP, SIZE, TOP - rows)
+    x0, y0, x1, y1 = exposed
+    frame[y0:y1, x0:x1] = rng.integers(0, 256, (y1 - y0, x1 - x0, 3), dtype=np.uint8)
+    for x0, y0, x1, y1 in EXTRA:
+        frame[y0:y1, x0:x1] = rng.integers(0, 256, (y1 - y0, x1 - x0, 3), dtype=np.uint8)
+    return frame, [exposed] + EXTRA
+
+def shown(panel, frame, pixel_format):
+    pack = rgb444 if pixel_format == "rgb444" else rgb565
+    return panel.read(SIZE, SIZE, panel.shown()), pack(np.asarray(frame))
+
+@pytest.mark.parametrize("rotation, supported", [(0, False), (90, False), (180, True), (270, True)])
+def test_scroll_area_follows_gate_lines(rotation, supported):
+    display, panel = make_display(rotation)
+
+    # At 0 and 90 degrees frame rows run across the gate lines
+    assert display.set_scroll_area(TOP, BOTTOM) is supported
+    assert display.scroll(5) is supported
+
+@pytest.mark.parametrize("pixel_format", ["rgb565", "rgb444"])
+@pytest.mark.parametrize("rotation", [180, 270])
+def test_scroll_sends_only_exposed_rows(rotation, pixel_format):
+    display, panel = make_display(rotation)
+    display.set_pixel_format(pixel_format)
+    rng = np.random.default_rng(6)
+    frame = random_frame(7)
+    display.ShowImage(frame_image(frame))
+
+    for rows in STEPS:
+        frame, regions = scrolled(frame, rows, rng)
+        panel.pixels_written = 0
+
+        assert display.set_scroll_area(TOP, BOTTOM)
+        assert display.scroll(rows)
+        display.ShowImage(frame_image(frame), regions)
+
+        actual, wanted = shown(panel, np.rot90(frame, -rotation // 90), pixel_format)
+        np.testing.assert_array_equal(actual, wanted)
+        sent = [display.converter.align(region) for region in display._normalize_regions(regions)]
+        assert panel.pixels_written == sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in sent)
+
+@pytest.mark.parametrize("rotation", [180, 270])
+def test_new_scroll_area_resends_frame(rotation):
+    display, panel = make_display(rotation)
+    frame = random_frame(8)
+    display.ShowImage(frame_image(frame))
+    display.set_scroll_area(TOP, BOTTOM)
+    display.scroll(9)
+
+    # Moving the area while it is scrolled leaves rows out of place
+    display.set_scroll_area(TOP + 10, BOTTOM)
+    frame = random_frame(9)
+    display.ShowImage(frame_image(frame), [(0, 0, 4, 4)])
+
+    np.testing.assert_array_equal(panel.read(SIZE, SIZE, panel.shown()), expected(frame, rotation))
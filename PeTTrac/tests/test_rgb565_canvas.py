@@ -0,0 +1,95 @@
+# Drawing on an RGB565 frame gives the same pixels as drawing with PIL and
+# packing the result
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+import fonts
+from rgb565_canvas import RGB565Draw, RGB565Image, pack_rgb565, unpack_rgb565
+
+SIZE = (64, 48)
+
+RECTANGLES = [
+    # xy, fill, outline, width
+    ((4, 4, 20, 12), "RED", None, 1),
+    ((10, 8, 50, 40), None, (12, 200, 90), 1),
+    ((0, 0, 63, 47), (30, 60, 90), "WHITE", 3),
+    ((30, 20, 30, 20), "YELLOW", None, 1),
+    ((-10, -5, 8, 9), "BLUE", "GREEN", 2),
+    ((50, 30, 80, 60), (255, 128, 7), (1, 2, 3), 4),
+    ((20, 25, 29, 34), None, "CYAN", 5),
+]
+
+def make_pair(seed=None):
+    """A PIL canvas and an RGB565 canvas holding the same pixels"""
+    if seed is None:
+        rgb = np.zeros(SIZE[::-1] + (3,), dtype=np.uint8)
+    else:
+        # Start from colours RGB565 can hold, so both sides blend the same values
+        rgb = np.random.default_rng(seed).integers(0, 256, SIZE[::-1] + (3,), dtype=np.uint8)
+        rgb = unpack_rgb565(pack_rgb565(rgb))
+    image = Image.fromarray(rgb, "RGB")
+    frame = RGB565Image(SIZE, frame=pack_rgb565(rgb))
+    return ImageDraw.Draw(image), RGB565Draw(frame)
+
+def quantise(pil_canvas):
+    """Round the PIL canvas to what an RGB565 frame can hold"""
+    image = pil_canvas._image
+    image.paste(Image.fromarray(unpack_rgb565(pack_rgb565(np.asarray(image))), "RGB"))
+
+def assert_same(pil_canvas, rgb565_canvas):
+    expected = pack_rgb565(np.asarray(pil_canvas._image))
+    np.testing.assert_array_equal(rgb565_canvas.frame, expected)
+
+@pytest.mark.parametrize("xy, fill, outline, width", RECTANGLES)
+def test_rectangle(xy, fill, outline, width):
+    pil_canvas, rgb565_canvas = make_pair()
+
+    pil_canvas.rectangle(xy, fill=fill, outline=outline, width=width)
+    rgb565_canvas.rectangle(xy, fill=fill, outline=outline, width=width)
+
+    assert_same(pil_canvas, rgb565_canvas)
+
+@pytest.mark.parametrize("xy", [(3, 5), (-7, 10), (40, 30), (0, -20)])
+def test_paste(xy):
+    pil_canvas, rgb565_canvas = make_pair(1)
+    source = Image.fromarray(np.random.default_rng(2).integers(0, 256, (25, 30, 3), dtype=np.uint8), "RGB")
+
+    pil_canvas._image.paste(source, xy)
+    rgb565_canvas.blit(source, xy)
+    assert_same(pil_canvas, rgb565_canvas)
+
+    # Pasting RGB565 surfaces and colours as well
+    surface = RGB565Image(source.size, frame=pack_rgb565(np.asarray(source)[::-1]))
+    pil_canvas._image.paste(Image.fromarray(unpack_rgb565(surface.frame), "RGB"), (xy[1], xy[0]))
+    rgb565_canvas.blit(surface, (xy[1], xy[0]))
+    pil_canvas._image.paste("MAGENTA", (xy[0], xy[1], xy[0] + 9, xy[1] + 4))
+    rgb565_canvas._image.paste("MAGENTA", (xy[0], xy[1], xy[0] + 9, xy[1] + 4))
+    assert_same(pil_canvas, rgb565_canvas)
+
+@pytest.mark.parametrize("mode", ["L", "1"])
+def test_bitmap(mode):
+    pil_canvas, rgb565_canvas = make_pair(3)
+    coverage = np.random.default_rng(4).integers(0, 256, (20, 33), dtype=np.uint8)
+    mask = Image.fromarray(coverage, "L").convert(mode)
+
+    for xy, fill in [((5, 6), (200, 100, 50)), ((40, 35), "WHITE"), ((-8, -3), "#3080ff")]:
+        pil_canvas.bitmap(xy, mask, fill=fill)
+        rgb565_canvas.bitmap(xy, mask, fill=fill)
+        # Overlapping draws blend over the stored 16 bit result
+        quantise(pil_canvas)
+
+    assert_same(pil_canvas, rgb565_canvas)
+
+def test_text():
+    pil_canvas, rgb565_canvas = make_pair(5)
+    font = fonts.get_font("regular", "medium")
+
+    for xy, text, fill in [((2, 2), "PeTTraC 42%", "WHITE"), ((10, 25), "gjpqy", (255, 200, 0)),
+                           ((40, 38), "clip", "RED")]:
+        fonts.draw_text(pil_canvas, xy, text, font, fill)
+        fonts.draw_text(rgb565_canvas, xy, text, font, fill)
+        quantise(pil_canvas)
+
+    assert_same(pil_canvas, rgb565_canvas)
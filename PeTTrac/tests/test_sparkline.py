@@ -0,0 +1,52 @@
+# Sparkline charts updated a few samples at a time match a full redraw
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+from rgb565_canvas import RGB565Draw, RGB565Image
+from state_manager import History
+from ui_framework import Rect, Sparkline
+
+WIDTH, HEIGHT = 40, 16
+
+def make_canvas(kind):
+    if kind == "rgb565":
+        image = RGB565Image((WIDTH + 10, HEIGHT + 10))
+        return RGB565Draw(image)
+    return ImageDraw.Draw(Image.new("RGB", (WIDTH + 10, HEIGHT + 10)))
+
+def make_chart(history):
+    return Sparkline(Rect(5, 5, WIDTH, HEIGHT), history, line_color="WHITE", fill_color="BLUE")
+
+def pixels(canvas):
+    return np.asarray(canvas._image).copy()
+
+@pytest.mark.parametrize("kind", ["rgb", "rgb565"])
+def test_incremental_matches_full_redraw(kind):
+    history = History(WIDTH + 7)
+    samples = np.random.default_rng(1).uniform(-10, 110, 200)
+    chart = make_chart(history)
+    canvas = make_canvas(kind)
+
+    # Add samples in uneven batches so the ring buffer wraps between draws
+    position = 0
+    for batch in [3, 1, 5, 30, 2, 1, 8, 13, 1, 4]:
+        for value in samples[position:position + batch]:
+            history.append(value)
+        position += batch
+        chart.draw_component(canvas)
+
+        fresh_canvas = make_canvas(kind)
+        make_chart(history).draw_component(fresh_canvas)
+        np.testing.assert_array_equal(pixels(canvas), pixels(fresh_canvas))
+
+def test_history_last_is_a_view():
+    history = History(5)
+    for value in range(7):
+        history.append(value)
+
+    segments = history.last(4)
+
+    assert [value for samples in segments for value in samples.tolist()] == [3, 4, 5, 6]
+    assert all(samples.base is history._samples for samples in segments)
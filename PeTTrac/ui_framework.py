@@ -2,16 +2,41 @@
 # PeTTraC UI Framework
 # Provides a component-based architecture for UI elements
 
+import math
 import logging
+import functools
+import numpy as np
+from collections import OrderedDict
 from typing import List, Tuple, Dict, Any, Optional, Callable
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageColor, ImageDraw, ImageFont
 from config import get_config
 import fonts
 from event_system import get_event_bus, Event, EventTypes
+from animation import get_animator, Tween
+from rgb565_canvas import RGB565Image, RGB565Draw, pack_color
 
 # Get configuration for default values
 config = get_config()
 
+# Boxes are (x0, y0, x1, y1) with exclusive end, as passed to the display
+Box = Tuple[int, int, int, int]
+
+def boxes_intersect(a: Box, b: Box) -> bool:
+    """Check whether two boxes overlap"""
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+def union_box(a: Box, b: Box) -> Box:
+    """Get the smallest box containing both boxes"""
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+def new_surface(canvas, size: Tuple[int, int], color):
+    """Create an offscreen image, and a canvas for it, in the format of canvas"""
+    if isinstance(canvas, RGB565Draw):
+        image = RGB565Image(size, color)
+        return image, RGB565Draw(image)
+    image = Image.new("RGB", size, color)
+    return image, ImageDraw.Draw(image)
+
 class Point:
     """Simple point class for positions"""
     def __init__(self, x: int, y: int):
@@ -32,6 +57,13 @@ class Rect:
     def __repr__(self):
         return f"Rect({self.x}, {self.y}, {self.width}, {self.height})"
     
+    def __eq__(self, other):
+        if not isinstance(other, Rect):
+            return NotImplemented
+        return (self.x, self.y, self.width, self.height) == (other.x, other.y, other.width, other.height)
+    
+    __hash__ = None
+    
     def contains(self, point: Point) -> bool:
         """Check if the rectangle contains the point"""
         return (
@@ -44,6 +76,60 @@ class Rect:
     def to_tuple(self) -> Tuple[int, int, int, int]:
         """Convert to tuple for PIL drawing"""
         return (self.x, self.y, self.x + self.width, self.y + self.height)
+    
+    def to_box(self) -> Box:
+        """Get the pixels PIL paints for to_tuple() as an exclusive-end box"""
+        return (self.x, self.y, self.x + self.width + 1, self.y + self.height + 1)
+
+RGB = Tuple[int, int, int]
+
+def rgb_to_rgb565(rgb: RGB) -> int:
+    """Pack an RGB colour into the 16 bit format the display uses"""
+    r, g, b = rgb
+    return ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
+
+@functools.lru_cache(maxsize=64)
+def parse_color(color: str) -> RGB:
+    """Parse a colour name or hex string once"""
+    return ImageColor.getrgb(color)[:3]
+
+class Palette:
+    """A theme compiled to RGB tuples and packed RGB565 values"""
+    
+    def __init__(self, name: str, colors: Dict[str, str]):
+        self.name = name
+        self.rgb: Dict[str, RGB] = {element: parse_color(color) for element, color in colors.items()}
+        self.rgb565: Dict[str, int] = {element: rgb_to_rgb565(rgb) for element, rgb in self.rgb.items()}
+
+class ThemeColor:
+    """Reference to a theme element's colour in the current palette
+    
+    There is one reference per element. The theme manager updates it when
+    the theme changes, so components holding it always draw with the
+    current theme.
+    """
+    
+    __slots__ = ("element", "rgb", "rgb565")
+    
+    def __init__(self, element: str, rgb: RGB):
+        self.element = element
+        self.set(rgb)
+    
+    def set(self, rgb: RGB):
+        """Point the reference at a new colour"""
+        self.rgb = rgb
+        self.rgb565 = rgb_to_rgb565(rgb)
+    
+    def __repr__(self):
+        return f"ThemeColor({self.element!r}, {self.rgb})"
+
+def resolve_color(color) -> Optional[RGB]:
+    """Get the RGB tuple to draw with for a theme reference, name or tuple"""
+    if isinstance(color, ThemeColor):
+        return color.rgb
+    if isinstance(color, str):
+        return parse_color(color)
+    return color
 
 class ThemeManager:
     """Manages UI themes"""
@@ -117,11 +203,19 @@ class ThemeManager:
             cls._instance = ThemeManager()
         return cls._instance
     
+    # Colour for elements a theme doesn't define
+    FALLBACK_COLOR = (255, 255, 255)
+    
     def __init__(self):
         """Initialize theme manager"""
         self.current_theme = config.get("display", "theme") or "default"
         self.event_bus = get_event_bus()
         
+        # Compile every theme once; components hold ThemeColor references
+        self.palettes = {name: Palette(name, colors) for name, colors in self.THEMES.items()}
+        self.palette = self.palettes.get(self.current_theme, self.palettes["default"])
+        self.colors: Dict[str, ThemeColor] = {}
+        
         # Subscribe to theme change events
         self.event_bus.subscribe(EventTypes.THEME_CHANGE, self._handle_theme_change)
     
@@ -130,15 +224,28 @@ class ThemeManager:
         if "theme" in event.data:
             self.set_theme(event.data["theme"])
     
-    def get_color(self, element: str) -> str:
-        """Get color for a UI element based on the current theme"""
-        theme = self.THEMES.get(self.current_theme, self.THEMES["default"])
-        return theme.get(element, "WHITE")
+    def get_color(self, element: str) -> ThemeColor:
+        """Get a reference to a UI element's colour that follows the theme"""
+        color = self.colors.get(element)
+        if color is None:
+            color = ThemeColor(element, self.palette.rgb.get(element, self.FALLBACK_COLOR))
+            self.colors[element] = color
+        return color
+    
+    def get_rgb565(self, element: str) -> int:
+        """Get a UI element's colour in the current theme as RGB565"""
+        return self.palette.rgb565.get(element, rgb_to_rgb565(self.FALLBACK_COLOR))
     
     def set_theme(self, theme_name: str) -> bool:
         """Set the current theme"""
         if theme_name in self.THEMES:
             self.current_theme = theme_name
+            self.palette = self.palettes[theme_name]
+            
+            # Re-resolve every colour reference handed out so far
+            for element, color in self.colors.items():
+                color.set(self.palette.rgb.get(element, self.FALLBACK_COLOR))
+            
             config.set("display", "theme", theme_name)
             return True
         return False
@@ -156,37 +263,293 @@ def get_theme_manager():
     """Get the theme manager instance"""
     return ThemeManager.get_instance()
 
+class SurfaceCache:
+    """Keeps rendered component pixels for reuse, with LRU eviction
+    
+    Surfaces are RGB images keyed by everything that affects how a
+    component looks. When the cache grows past its byte limit the least
+    recently used surfaces are dropped.
+    """
+    
+    _instance = None
+    
+    @classmethod
+    def get_instance(cls):
+        """Get singleton instance"""
+        if cls._instance is None:
+            max_kb = config.get("display", "surface_cache_kb")
+            cls._instance = SurfaceCache((max_kb if max_kb is not None else 512) * 1024)
+        return cls._instance
+    
+    def __init__(self, max_bytes: int):
+        """Initialize an empty cache holding at most max_bytes of pixels"""
+        self.max_bytes = max_bytes
+        self.surfaces = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key) -> Optional[Image.Image]:
+        """Get a cached surface, or None if there is none"""
+        surface = self.surfaces.get(key)
+        if surface is None:
+            self.misses += 1
+            return None
+        self.surfaces.move_to_end(key)
+        self.hits += 1
+        return surface
+    
+    def put(self, key, surface: Image.Image):
+        """Store a surface, evicting old ones to stay within the limit"""
+        nbytes = self._nbytes(surface)
+        if nbytes > self.max_bytes:
+            return
+        
+        old = self.surfaces.pop(key, None)
+        if old is not None:
+            self.size -= self._nbytes(old)
+        
+        self.surfaces[key] = surface
+        self.size += nbytes
+        while self.size > self.max_bytes:
+            _, evicted = self.surfaces.popitem(last=False)
+            self.size -= self._nbytes(evicted)
+    
+    @staticmethod
+    def _nbytes(surface) -> int:
+        """Memory used by a surface's pixels"""
+        if isinstance(surface, RGB565Image):
+            return surface.frame.nbytes
+        return surface.width * surface.height * len(surface.getbands())
+    
+    def clear(self):
+        """Drop all cached surfaces"""
+        self.surfaces.clear()
+        self.size = 0
+
+# Convenience function to get surface cache
+def get_surface_cache():
+    """Get the surface cache instance"""
+    return SurfaceCache.get_instance()
+
+class InputRouter:
+    """Sends input events to the screen that has focus
+    
+    Screens don't subscribe to input themselves; each event goes down the
+    focused screen's component tree only, so a press costs the same
+    however many screens have been built.
+    """
+    
+    _instance = None
+    
+    INPUT_EVENTS = (EventTypes.BUTTON_PRESS, EventTypes.BUTTON_RELEASE)
+    
+    @classmethod
+    def get_instance(cls):
+        """Get singleton instance"""
+        if cls._instance is None:
+            cls._instance = InputRouter()
+        return cls._instance
+    
+    def __init__(self):
+        """Initialize with nothing focused"""
+        self.focused = None
+        self.event_bus = get_event_bus()
+        for event_type in self.INPUT_EVENTS:
+            self.event_bus.subscribe(event_type, self._dispatch)
+    
+    def focus(self, component: "UIComponent"):
+        """Give a component (normally a screen) the input focus"""
+        self.focused = component
+    
+    def blur(self, component: "UIComponent"):
+        """Take the focus away from a component if it has it"""
+        if self.focused is component:
+            self.focused = None
+    
+    def _dispatch(self, event: Event):
+        """Route an input event down the focused component tree"""
+        if self.focused:
+            self.focused.handle_event(event)
+
+# Convenience function to get input router
+def get_input_router():
+    """Get the input router instance"""
+    return InputRouter.get_instance()
+
 class UIComponent:
-    """Base class for all UI components"""
+    """Base class for all UI components
+    
+    Components are kept in a retained tree. Assigning a new value to any
+    attribute listed in VISUAL_ATTRIBUTES marks the component dirty, and
+    Screen.render only repaints dirty components (and whatever overlaps
+    them) instead of the whole screen.
+    
+    A component's rect is relative to its parent. The absolute rect used for
+    drawing and hit testing is worked out once and cached until the rect of
+    the component or of an ancestor changes, or it moves to another parent.
+    """
+    
+    # Attributes that change what the component looks like
+    VISUAL_ATTRIBUTES = frozenset({"rect", "visible"})
     
-    def __init__(self, rect: Optional[Rect] = None):
+    def __init__(self, rect: Optional[Rect] = None, cached: bool = False):
+        self._dirty = True
+        self._dirty_children = False
+        self._drawn_box: Optional[Box] = None
+        self._layout_valid = False
+        self.layout_rect: Optional[Rect] = None  # cached absolute rect
         self.rect = rect
         self.visible = True
+        # Reuse rendered pixels from the surface cache (opt-in, see paint)
+        self.cached = cached
         self.parent = None
         self.children: List[UIComponent] = []
         self.theme_manager = get_theme_manager()
         self.event_bus = get_event_bus()
     
+    def __setattr__(self, name, value):
+        if name in self.VISUAL_ATTRIBUTES:
+            current = self.__dict__.get(name, value)
+            if current is not value and current != value:
+                object.__setattr__(self, name, value)
+                self.invalidate()
+                if name == "rect":
+                    self.invalidate_layout()
+                return
+        object.__setattr__(self, name, value)
+    
+    def invalidate(self):
+        """Mark this component as needing a redraw"""
+        if self._dirty:
+            return
+        self._dirty = True
+        
+        # Let ancestors know there is something dirty below them
+        node = self.parent
+        while node is not None and not node._dirty_children:
+            node._dirty_children = True
+            node = node.parent
+    
+    def invalidate_layout(self):
+        """Forget the cached absolute rects of this component and its descendants"""
+        # Descendants of a component without a layout never have one either
+        if not self._layout_valid:
+            return
+        self._layout_valid = False
+        for child in self.children:
+            child.invalidate_layout()
+    
+    def get_paint_box(self) -> Optional[Box]:
+        """Get the area this component paints when drawn"""
+        if not self.rect:
+            return None
+        return self.get_absolute_rect().to_box()
+    
     def draw(self, canvas: ImageDraw.ImageDraw):
         """Draw the component and its children"""
+        self._dirty = False
+        self._dirty_children = False
+        
         if not self.visible:
+            self._drawn_box = None
+            self._mark_hidden()
             return
         
         # Draw self first
-        self.draw_component(canvas)
+        self._drawn_box = self.paint(canvas)
         
         # Then draw children
         for child in self.children:
             child.draw(canvas)
     
+    def _mark_hidden(self):
+        """Forget the drawn area of all descendants of a hidden component"""
+        for child in self.children:
+            child._dirty = False
+            child._dirty_children = False
+            child._drawn_box = None
+            child._mark_hidden()
+    
     def draw_component(self, canvas: ImageDraw.ImageDraw):
         """Draw just this component (override in subclasses)"""
         pass
     
+    def paint(self, canvas: ImageDraw.ImageDraw) -> Optional[Box]:
+        """Draw just this component, from the surface cache if enabled
+        
+        A cached component is rendered once onto a surface filled with the
+        background of its nearest ancestor that has one, and that surface is
+        pasted on later frames. Only enable caching on components drawn
+        directly over that background. Returns the painted box.
+        """
+        box = self.get_paint_box()
+        if not self.cached or not box:
+            self.draw_component(canvas)
+            return box
+        
+        try:
+            key = self._surface_key(box)
+            hash(key)
+        except TypeError:
+            # Some visual state can't be used as a key
+            self.draw_component(canvas)
+            return box
+        
+        cache = get_surface_cache()
+        surface = cache.get(key)
+        if surface is None:
+            surface = self._render_surface(box, key[-1], canvas)
+            cache.put(key, surface)
+        
+        # ImageDraw keeps the image it draws on
+        canvas._image.paste(surface, box[:2])
+        return box
+    
+    def _surface_key(self, box: Box):
+        """Key describing everything that affects this component's pixels"""
+        state = tuple(
+            (name, getattr(self, name, None))
+            for name in sorted(self.VISUAL_ATTRIBUTES - {"rect", "visible"})
+        )
+        rect = self.get_absolute_rect()
+        offset = (box[0] - rect.x, box[1] - rect.y, box[2] - box[0], box[3] - box[1])
+        return (type(self), state, self.rect.width, self.rect.height, offset,
+                self.theme_manager.get_current_theme(), self._backdrop_color())
+    
+    def _backdrop_color(self):
+        """Get the background colour this component is drawn over"""
+        node = self.parent
+        while node is not None:
+            bg_color = getattr(node, "bg_color", None)
+            if bg_color:
+                return resolve_color(bg_color)
+            node = node.parent
+        return "BLACK"
+    
+    def _render_surface(self, box: Box, backdrop, canvas) -> Image.Image:
+        """Render this component onto a new surface covering box
+        
+        The surface has the same pixel format as canvas.
+        """
+        surface, surface_canvas = new_surface(canvas, (box[2] - box[0], box[3] - box[1]), backdrop)
+        
+        # Draw with the layout moved so the box origin lands on the surface origin
+        rect = self.get_absolute_rect()
+        self.layout_rect = Rect(rect.x - box[0], rect.y - box[1], rect.width, rect.height)
+        try:
+            self.draw_component(surface_canvas)
+        finally:
+            self.layout_rect = rect
+        return surface
+    
     def add_child(self, child: 'UIComponent'):
         """Add a child component"""
         self.children.append(child)
         child.parent = self
+        child.invalidate_layout()
+        child._dirty = False
+        child.invalidate()
         return child
     
     def remove_child(self, child: 'UIComponent'):
@@ -194,6 +557,32 @@ class UIComponent:
         if child in self.children:
             self.children.remove(child)
             child.parent = None
+            child.invalidate_layout()
+            
+            # The area it covered has to be repainted
+            if child._drawn_box:
+                self.invalidate_box(child._drawn_box)
+            child._drawn_box = None
+    
+    def invalidate_box(self, box: Box):
+        """Mark an area of the screen as needing a repaint"""
+        root = self
+        while root.parent is not None:
+            root = root.parent
+        if isinstance(root, Screen):
+            root.damage.append(box)
+    
+    def report_scroll(self, box: Box, rows: int):
+        """Note that what is drawn in an area moved up by a number of rows
+        
+        Called from draw_component; the display can then scroll its memory
+        instead of being sent the whole area again.
+        """
+        root = self
+        while root.parent is not None:
+            root = root.parent
+        if isinstance(root, Screen):
+            root.scrolled.append((box, rows))
     
     def set_rect(self, rect: Rect):
         """Set component rectangle"""
@@ -218,24 +607,35 @@ class UIComponent:
         return False
     
     def get_absolute_rect(self) -> Rect:
-        """Get the absolute rectangle accounting for parent offsets"""
+        """Get the absolute rectangle accounting for parent offsets
+        
+        The result is cached and shared, so it must not be modified.
+        """
+        if self._layout_valid:
+            return self.layout_rect
+        
         if not self.rect:
-            return Rect(0, 0, 0, 0)
-            
-        if not self.parent:
-            return self.rect
-            
-        parent_rect = self.parent.get_absolute_rect()
-        return Rect(
-            parent_rect.x + self.rect.x,
-            parent_rect.y + self.rect.y,
-            self.rect.width,
-            self.rect.height
-        )
+            layout_rect = Rect(0, 0, 0, 0)
+        elif not self.parent:
+            layout_rect = self.rect
+        else:
+            parent_rect = self.parent.get_absolute_rect()
+            layout_rect = Rect(
+                parent_rect.x + self.rect.x,
+                parent_rect.y + self.rect.y,
+                self.rect.width,
+                self.rect.height
+            )
+        
+        self.layout_rect = layout_rect
+        self._layout_valid = True
+        return layout_rect
 
 class Container(UIComponent):
     """A container for other components"""
     
+    VISUAL_ATTRIBUTES = UIComponent.VISUAL_ATTRIBUTES | {"bg_color"}
+    
     def __init__(self, rect: Rect, bg_color: Optional[str] = None):
         super().__init__(rect)
         self.bg_color = bg_color
@@ -243,15 +643,101 @@ class Container(UIComponent):
     def draw_component(self, canvas: ImageDraw.ImageDraw):
         """Draw container background if color is specified"""
         if self.bg_color:
-            canvas.rectangle(self.rect.to_tuple(), fill=self.bg_color)
+            canvas.rectangle(self.get_absolute_rect().to_tuple(), fill=resolve_color(self.bg_color))
+    
+    def get_paint_box(self) -> Optional[Box]:
+        """A container without a background paints nothing itself"""
+        if not self.bg_color:
+            return None
+        return super().get_paint_box()
+
+class LayoutContainer(Container):
+    """Base for containers that position their children themselves
+    
+    Children are rearranged whenever one is added or removed, or when the
+    container's own rect or spacing changes.
+    """
+    
+    def __init__(self, rect: Rect, spacing: int = 0, padding: int = 0,
+                 bg_color: Optional[str] = None):
+        super().__init__(rect, bg_color)
+        self.spacing = spacing
+        self.padding = padding
+    
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in ("rect", "spacing", "padding") and "padding" in self.__dict__:
+            self.arrange()
+    
+    def add_child(self, child: UIComponent):
+        """Add a child component and rearrange"""
+        super().add_child(child)
+        self.arrange()
+        return child
+    
+    def remove_child(self, child: UIComponent):
+        """Remove a child component and rearrange"""
+        super().remove_child(child)
+        self.arrange()
+    
+    def arrange(self):
+        """Set the rects of the children (override in subclasses)"""
+        pass
+
+class Row(LayoutContainer):
+    """Container that places its children left to right"""
+    
+    def arrange(self):
+        """Line children up from the left edge, keeping their sizes"""
+        x = self.padding
+        for child in self.children:
+            child.rect = Rect(x, self.padding, child.rect.width, child.rect.height)
+            x += child.rect.width + self.spacing
+
+class Column(LayoutContainer):
+    """Container that places its children top to bottom"""
+    
+    def arrange(self):
+        """Stack children down from the top edge, keeping their sizes"""
+        y = self.padding
+        for child in self.children:
+            child.rect = Rect(self.padding, y, child.rect.width, child.rect.height)
+            y += child.rect.height + self.spacing
+
+class Grid(LayoutContainer):
+    """Container that places its children in equal cells, row by row"""
+    
+    def __init__(self, rect: Rect, columns: int, spacing: int = 0, padding: int = 0,
+                 cell_height: Optional[int] = None, bg_color: Optional[str] = None):
+        self.columns = columns
+        self.cell_height = cell_height  # square cells if not given
+        super().__init__(rect, spacing, padding, bg_color)
+    
+    def arrange(self):
+        """Size every child to one cell, splitting the width between columns"""
+        inner_width = self.rect.width - 2 * self.padding - self.spacing * (self.columns - 1)
+        cell_width = inner_width // self.columns
+        cell_height = self.cell_height or cell_width
+        
+        for i, child in enumerate(self.children):
+            col = i % self.columns
+            row = i // self.columns
+            child.rect = Rect(
+                self.padding + col * (cell_width + self.spacing),
+                self.padding + row * (cell_height + self.spacing),
+                cell_width,
+                cell_height
+            )
 
 class Label(UIComponent):
     """Text label component"""
     
+    VISUAL_ATTRIBUTES = UIComponent.VISUAL_ATTRIBUTES | {"text", "color", "font", "align"}
+    
     def __init__(self, rect: Rect, text: str, font_type: str = "regular", 
                  font_size: str = "medium", color: Optional[str] = None, 
-                 align: str = "left"):
-        super().__init__(rect)
+                 align: str = "left", cached: bool = False):
+        super().__init__(rect, cached)
         self.text = text
         self.font_type = font_type
         self.font_size = font_size
@@ -259,21 +745,35 @@ class Label(UIComponent):
         self.align = align
         self.font = fonts.get_font(font_type, font_size)
     
-    def draw_component(self, canvas: ImageDraw.ImageDraw):
-        """Draw the label text"""
-        if not self.color:
-            self.color = self.theme_manager.get_color("text")
-            
-        # Calculate text position based on alignment
-        text_width = self.font.getlength(self.text)
-        x = self.rect.x
+    def _text_x(self):
+        """Calculate text position based on alignment"""
+        rect = self.get_absolute_rect()
+        text_width = fonts.get_atlas(self.font).get_length(self.text)
+        x = rect.x
         
         if self.align == "center":
-            x = self.rect.x + (self.rect.width - text_width) // 2
+            x = rect.x + (rect.width - text_width) // 2
         elif self.align == "right":
-            x = self.rect.x + self.rect.width - text_width
-            
-        canvas.text((x, self.rect.y), self.text, fill=self.color, font=self.font)
+            x = rect.x + rect.width - text_width
+        return x
+    
+    def draw_component(self, canvas: ImageDraw.ImageDraw):
+        """Draw the label text"""
+        color = resolve_color(self.color or self.theme_manager.get_color("text"))
+        y = self.get_absolute_rect().y
+        fonts.draw_text(canvas, (self._text_x(), y), self.text, self.font, color)
+    
+    def get_paint_box(self) -> Optional[Box]:
+        """The rect plus any text that spills out of it"""
+        box = super().get_paint_box()
+        if not self.text:
+            return box
+        
+        x, y = self._text_x(), self.get_absolute_rect().y
+        left, top, right, bottom = fonts.get_atlas(self.font).get_bbox(self.text)
+        text_box = (math.floor(x + left), math.floor(y + top),
+                    math.ceil(x + right) + 1, math.ceil(y + bottom) + 1)
+        return union_box(box, text_box)
     
     def set_text(self, text: str):
         """Set the label text"""
@@ -282,11 +782,15 @@ class Label(UIComponent):
 class Button(UIComponent):
     """Interactive button component"""
     
+    VISUAL_ATTRIBUTES = UIComponent.VISUAL_ATTRIBUTES | {
+        "text", "font", "bg_color", "text_color", "highlight_color", "pressed"
+    }
+    
     def __init__(self, rect: Rect, text: str, action: Optional[Callable[[], None]] = None,
                 font_type: str = "regular", font_size: str = "medium", 
                 bg_color: Optional[str] = None, text_color: Optional[str] = None,
-                highlight_color: Optional[str] = None):
-        super().__init__(rect)
+                highlight_color: Optional[str] = None, cached: bool = False):
+        super().__init__(rect, cached)
         self.text = text
         self.action = action
         self.font_type = font_type
@@ -300,25 +804,37 @@ class Button(UIComponent):
     def draw_component(self, canvas: ImageDraw.ImageDraw):
         """Draw the button"""
         # Get colors if not specified
-        if not self.bg_color:
-            self.bg_color = self.theme_manager.get_color("menu_bg")
-        
-        if not self.text_color:
-            self.text_color = self.theme_manager.get_color("menu_item")
-            
-        if not self.highlight_color:
-            self.highlight_color = self.theme_manager.get_color("highlight")
+        bg_color = resolve_color(self.bg_color or self.theme_manager.get_color("menu_bg"))
+        text_color = resolve_color(self.text_color or self.theme_manager.get_color("menu_item"))
+        highlight_color = resolve_color(self.highlight_color or self.theme_manager.get_color("highlight"))
         
         # Draw button background
-        canvas.rectangle(self.rect.to_tuple(), 
-                        fill=self.bg_color,
-                        outline=self.highlight_color if self.pressed else None)
+        canvas.rectangle(self.get_absolute_rect().to_tuple(), 
+                        fill=bg_color,
+                        outline=highlight_color if self.pressed else None)
         
         # Draw button text
-        text_width = self.font.getlength(self.text)
-        x = self.rect.x + (self.rect.width - text_width) // 2
-        y = self.rect.y + (self.rect.height - self.font.size) // 2
-        canvas.text((x, y), self.text, fill=self.text_color, font=self.font)
+        fonts.draw_text(canvas, self._text_position(), self.text, self.font, text_color)
+    
+    def _text_position(self):
+        """Calculate the position that centres the text on the button"""
+        text_width = fonts.get_atlas(self.font).get_length(self.text)
+        rect = self.get_absolute_rect()
+        x = rect.x + (rect.width - text_width) // 2
+        y = rect.y + (rect.height - self.font.size) // 2
+        return x, y
+    
+    def get_paint_box(self) -> Optional[Box]:
+        """The button rect plus any text that spills out of it"""
+        box = super().get_paint_box()
+        if not self.text:
+            return box
+        
+        x, y = self._text_position()
+        left, top, right, bottom = fonts.get_atlas(self.font).get_bbox(self.text)
+        text_box = (math.floor(x + left), math.floor(y + top),
+                    math.ceil(x + right) + 1, math.ceil(y + bottom) + 1)
+        return union_box(box, text_box)
     
     def on_event(self, event: Event) -> bool:
         """Handle button events"""
@@ -350,6 +866,10 @@ class Button(UIComponent):
 class ProgressBar(UIComponent):
     """Progress bar component"""
     
+    VISUAL_ATTRIBUTES = UIComponent.VISUAL_ATTRIBUTES | {
+        "value", "max_value", "bg_color", "fill_color", "border_color"
+    }
+    
     def __init__(self, rect: Rect, value: float, max_value: float = 100.0,
                 bg_color: Optional[str] = None, fill_color: Optional[str] = None,
                 border_color: Optional[str] = None):
@@ -363,28 +883,411 @@ class ProgressBar(UIComponent):
     def draw_component(self, canvas: ImageDraw.ImageDraw):
         """Draw the progress bar"""
         # Get colors if not specified
-        if not self.bg_color:
-            self.bg_color = self.theme_manager.get_color("background")
-        
-        if not self.fill_color:
-            self.fill_color = self.theme_manager.get_color("accent1")
-            
-        if not self.border_color:
-            self.border_color = self.theme_manager.get_color("text")
+        bg_color = resolve_color(self.bg_color or self.theme_manager.get_color("background"))
+        fill_color = resolve_color(self.fill_color or self.theme_manager.get_color("accent1"))
+        border_color = resolve_color(self.border_color or self.theme_manager.get_color("text"))
         
         # Draw background
-        canvas.rectangle(self.rect.to_tuple(), fill=self.bg_color, outline=self.border_color)
+        rect = self.get_absolute_rect()
+        canvas.rectangle(rect.to_tuple(), fill=bg_color, outline=border_color)
         
         # Calculate fill width based on value
-        fill_width = int((self.value / self.max_value) * (self.rect.width - 2))
+        fill_width = int((self.value / self.max_value) * (rect.width - 2))
         if fill_width > 0:
-            fill_rect = Rect(self.rect.x + 1, self.rect.y + 1, fill_width, self.rect.height - 2)
-            canvas.rectangle(fill_rect.to_tuple(), fill=self.fill_color)
+            fill_rect = Rect(rect.x + 1, rect.y + 1, fill_width, rect.height - 2)
+            canvas.rectangle(fill_rect.to_tuple(), fill=fill_color)
     
     def set_value(self, value: float):
         """Set the current value"""
         self.value = max(0, min(value, self.max_value))
 
+class BatteryGauge(UIComponent):
+    """Battery outline with a bar showing the charge level
+    
+    The outline and tip are rendered once per size and colour scheme and
+    shared by every gauge; a new percentage pastes that image and fills the
+    bar in the colour for the charge level.
+    """
+    
+    VISUAL_ATTRIBUTES = UIComponent.VISUAL_ATTRIBUTES | {
+        "percentage", "outline_color", "fill_color", "low_color", "critical_color"
+    }
+    
+    # Outline images by (canvas type, size, backdrop, outline colour)
+    _outlines: Dict[tuple, Image.Image] = {}
+    
+    def __init__(self, rect: Rect, percentage: Optional[int] = None,
+                 outline_color: Optional[str] = None, fill_color: Optional[str] = None,
+                 low_color: Optional[str] = None, critical_color: Optional[str] = None):
+        super().__init__(rect)
+        self.percentage = percentage  # None while unknown; the bar is left empty
+        self.outline_color = outline_color
+        self.fill_color = fill_color
+        self.low_color = low_color
+        self.critical_color = critical_color
+        self.low_level = config.get("battery", "low_warning") or 20
+        self.critical_level = config.get("battery", "critical_warning") or 10
+    
+    def set_percentage(self, percentage: Optional[int]):
+        """Set the charge level"""
+        self.percentage = percentage
+    
+    def get_paint_box(self) -> Optional[Box]:
+        """The gauge covers its rect exactly"""
+        rect = self.get_absolute_rect()
+        return (rect.x, rect.y, rect.x + rect.width, rect.y + rect.height)
+    
+    def _geometry(self, width: int, height: int):
+        """Get the body width, tip width and border width for a size"""
+        tip = max(2, width // 10)
+        border = 2 if height >= 20 else 1
+        return width - tip, tip, border
+    
+    def _outline(self, canvas, width: int, height: int, backdrop, color) -> Image.Image:
+        """Get the outline image in the format of canvas, rendering it the first time"""
+        key = (type(canvas), width, height, backdrop, color)
+        image = self._outlines.get(key)
+        if image is None:
+            body, tip, border = self._geometry(width, height)
+            image, draw = new_surface(canvas, (width, height), backdrop)
+            draw.rectangle((0, 0, body - 1, height - 1), outline=color, width=border)
+            draw.rectangle((body, height // 3, width - 1, height - height // 3 - 1), fill=color)
+            self._outlines[key] = image
+        return image
+    
+    def _level_color(self):
+        """Get the bar colour for the current charge level"""
+        if self.percentage <= self.critical_level:
+            return resolve_color(self.critical_color or self.theme_manager.get_color("error"))
+        if self.percentage <= self.low_level:
+            return resolve_color(self.low_color or self.theme_manager.get_color("warning"))
+        return resolve_color(self.fill_color or self.theme_manager.get_color("accent2"))
+    
+    def draw_component(self, canvas: ImageDraw.ImageDraw):
+        """Draw the gauge"""
+        rect = self.get_absolute_rect()
+        outline_color = resolve_color(self.outline_color or self.theme_manager.get_color("text"))
+        outline = self._outline(canvas, rect.width, rect.height, self._backdrop_color(), outline_color)
+        
+        # ImageDraw keeps the image it draws on
+        canvas._image.paste(outline, (rect.x, rect.y))
+        
+        if self.percentage is None:
+            return
+        body, tip, border = self._geometry(rect.width, rect.height)
+        inset = border + 1
+        fill_width = round(max(0, min(self.percentage, 100)) / 100 * (body - 2 * inset))
+        if fill_width > 0:
+            x, y = rect.x + inset, rect.y + inset
+            canvas._image.paste(self._level_color(), (x, y, x + fill_width, y + rect.height - 2 * inset))
+
+class Sparkline(UIComponent):
+    """Line chart of the most recent samples in a History
+    
+    Each pixel column shows one sample, newest on the right. The chart is
+    kept on a surface in the canvas format; when new samples arrive it is
+    shifted left in place and only the new columns are drawn. Call update()
+    regularly so the chart is repainted when the history grows.
+    """
+    
+    VISUAL_ATTRIBUTES = UIComponent.VISUAL_ATTRIBUTES | {
+        "min_value", "max_value", "line_color", "fill_color", "bg_color"
+    }
+    
+    def __init__(self, rect: Rect, history, min_value: float = 0.0, max_value: float = 100.0,
+                 line_color: Optional[str] = None, fill_color: Optional[str] = None,
+                 bg_color: Optional[str] = None):
+        super().__init__(rect)
+        self.history = history
+        self.min_value = min_value
+        self.max_value = max_value
+        self.line_color = line_color
+        self.fill_color = fill_color  # area under the line, left empty if not set
+        self.bg_color = bg_color
+        
+        self._surface = None  # image pasted onto the canvas
+        self._pixels: Optional[np.ndarray] = None  # the surface's pixels, shared with it
+        self._drawn_count = 0  # history.count when the pixels were last updated
+        self._drawn_style = None  # everything else the pixels depend on
+        self._last_y = None  # row of the newest sample drawn
+    
+    def update(self):
+        """Repaint if samples arrived since the last draw"""
+        if self.history.count != self._drawn_count:
+            self.invalidate()
+    
+    def get_paint_box(self) -> Optional[Box]:
+        """The chart covers its rect exactly"""
+        rect = self.get_absolute_rect()
+        return (rect.x, rect.y, rect.x + rect.width, rect.y + rect.height)
+    
+    def _make_surface(self, canvas, size: Tuple[int, int]):
+        """Create the surface and the array holding its pixels"""
+        if isinstance(canvas, RGB565Draw):
+            self._surface = RGB565Image(size)
+            self._pixels = self._surface.frame
+        else:
+            # frombuffer shares the array, and an RGBA image is pasted onto
+            # an RGB canvas without conversion, so drawing never allocates
+            self._pixels = np.zeros((size[1], size[0], 4), dtype=np.uint8)
+            self._surface = Image.frombuffer("RGBA", size, self._pixels, "raw", "RGBA", 0, 1)
+        self._drawn_style = None
+    
+    def _pixel(self, rgb):
+        """Get the value of a colour in the surface's pixel array"""
+        if rgb is None:
+            return None
+        if self._pixels.ndim == 2:
+            return pack_color(rgb)
+        return (*rgb[:3], 255)
+    
+    def _row(self, value: float) -> int:
+        """Get the pixel row for a sample"""
+        height = self._pixels.shape[0]
+        span = (self.max_value - self.min_value) or 1
+        t = min(1.0, max(0.0, (value - self.min_value) / span))
+        return height - 1 - round(t * (height - 1))
+    
+    def _draw_columns(self, segments, first_x: int, colors):
+        """Draw samples from each segment into consecutive columns starting at first_x
+        
+        A sample left of the chart only sets where the line comes in from.
+        """
+        bg, line, fill = colors
+        x = first_x
+        for samples in segments:
+            for value in samples:
+                y = self._row(value)
+                if x < 0:
+                    self._last_y = y
+                    x += 1
+                    continue
+                column = self._pixels[:, x]
+                column[:] = bg
+                if fill is not None:
+                    column[y:] = fill
+                # Join up with the previous sample so steep changes stay connected
+                prev = y if self._last_y is None else self._last_y
+                column[min(y, prev):max(y, prev) + 1] = line
+                self._last_y = y
+                x += 1
+    
+    def _sync(self):
+        """Bring the pixels up to date with the history"""
+        colors = (
+            self._pixel(resolve_color(self.bg_color or self.theme_manager.get_color("background"))),
+            self._pixel(resolve_color(self.line_color or self.theme_manager.get_color("accent1"))),
+            self._pixel(resolve_color(self.fill_color) if self.fill_color else None),
+        )
+        style = (colors, self.min_value, self.max_value)
+        
+        width = self._pixels.shape[1]
+        count = self.history.count
+        new = count - self._drawn_count
+        
+        if style != self._drawn_style or new >= width:
+            # Redraw every column, joined up with the sample before the first
+            segments = self.history.last(width + 1)
+            self._pixels[:] = colors[0]
+            self._last_y = None
+            self._draw_columns(segments, width - sum(len(samples) for samples in segments), colors)
+        elif new > 0:
+            # Scroll left in place and draw just the new samples. Shifting
+            # the flattened pixels is a single move without a temporary
+            # copy; what wraps into the end of each row is redrawn
+            pixels = self._pixels.reshape(-1)
+            shift = self._pixels[0, :new].size
+            pixels[:-shift] = pixels[shift:]
+            self._draw_columns(self.history.last(new), width - new, colors)
+        
+        self._drawn_count = count
+        self._drawn_style = style
+    
+    def draw_component(self, canvas: ImageDraw.ImageDraw):
+        """Draw the chart"""
+        rect = self.get_absolute_rect()
+        size = (rect.width, rect.height)
+        if (self._surface is None or self._surface.size != size
+                or isinstance(self._surface, RGB565Image) != isinstance(canvas, RGB565Draw)):
+            self._make_surface(canvas, size)
+        self._sync()
+        # ImageDraw keeps the image it draws on
+        canvas._image.paste(self._surface, (rect.x, rect.y))
+
+class ListView(UIComponent):
+    """Scrolling list that only keeps and draws the rows in view
+    
+    Items are pulled from the get_item callback when their row scrolls into
+    view. Rows live in a fixed pool of slots, two more than fit in the view,
+    which are reused as the list scrolls, so memory and drawing cost depend
+    on the height of the view and not on item_count. Rows are drawn on an
+    offscreen buffer so partly visible rows are clipped to the list.
+    
+    up/down move the selection, scrolling smoothly to keep it in view, and
+    press calls on_select with the selected index.
+    """
+    
+    VISUAL_ATTRIBUTES = UIComponent.VISUAL_ATTRIBUTES | {
+        "item_count", "selected", "scroll_offset", "font", "align",
+        "bg_color", "row_color", "text_color", "selected_bg_color", "selected_text_color"
+    }
+    
+    SCROLL_DURATION = 0.15  # seconds
+    
+    def __init__(self, rect: Rect, item_count: int, get_item: Callable[[int], str],
+                 row_height: int = 30, spacing: int = 0,
+                 on_select: Optional[Callable[[int], None]] = None,
+                 font_type: str = "regular", font_size: str = "medium", align: str = "center",
+                 bg_color: Optional[str] = None, row_color: Optional[str] = None,
+                 text_color: Optional[str] = None, selected_bg_color: Optional[str] = None,
+                 selected_text_color: Optional[str] = None):
+        super().__init__(rect)
+        self.item_count = item_count
+        self.get_item = get_item
+        self.row_height = row_height
+        self.row_pitch = row_height + spacing
+        self.on_select = on_select
+        self.font = fonts.get_font(font_type, font_size)
+        self.align = align
+        self.bg_color = bg_color  # between rows; the backdrop if not set
+        self.row_color = row_color
+        self.text_color = text_color
+        self.selected_bg_color = selected_bg_color
+        self.selected_text_color = selected_text_color
+        self.selected = 0
+        self.scroll_offset = 0  # pixels scrolled from the top of the first row
+        self._scroll_tween = None
+        self._drawn_offset = None  # scroll_offset when last drawn
+        
+        # Row slots as [item index, text]; item i always uses slot i % len
+        self._rows = [[-1, ""] for _ in range(rect.height // self.row_pitch + 2)]
+        self._buffer: Optional[Image.Image] = None
+        self._buffer_canvas: Optional[ImageDraw.ImageDraw] = None
+    
+    def set_items(self, item_count: int, get_item: Optional[Callable[[int], str]] = None):
+        """Replace the items, keeping the selection and scroll in range"""
+        self.item_count = item_count
+        if get_item:
+            self.get_item = get_item
+        self.refresh()
+        self.select(min(self.selected, max(0, item_count - 1)), animate=False)
+    
+    def refresh(self):
+        """Pull the visible items from the data source again"""
+        for row in self._rows:
+            row[0] = -1
+        self.invalidate()
+    
+    def select(self, index: int, animate: bool = True):
+        """Select an item and scroll it into view"""
+        if not self.item_count:
+            return
+        self.selected = max(0, min(index, self.item_count - 1))
+        
+        top = self.selected * self.row_pitch
+        height = self.get_absolute_rect().height
+        if top < self.scroll_offset:
+            self.scroll_to(top, animate)
+        elif top + self.row_height > self.scroll_offset + height:
+            self.scroll_to(top + self.row_height - height, animate)
+    
+    def scroll_to(self, offset: int, animate: bool = True):
+        """Scroll so offset pixels of the list are above the view"""
+        height = self.get_absolute_rect().height
+        max_offset = max(0, self.item_count * self.row_pitch - (self.row_pitch - self.row_height) - height)
+        offset = max(0, min(offset, max_offset))
+        
+        animator = get_animator()
+        if self._scroll_tween:
+            animator.cancel(self._scroll_tween)
+            self._scroll_tween = None
+        
+        if animate:
+            self._scroll_tween = animator.add(Tween(
+                self.scroll_offset, offset, self.SCROLL_DURATION, self._set_scroll_offset
+            ))
+        else:
+            self.scroll_offset = offset
+    
+    def _set_scroll_offset(self, offset: float):
+        """Tween callback; only whole pixel moves cause a redraw"""
+        self.scroll_offset = round(offset)
+    
+    def _row_text(self, index: int) -> str:
+        """Get an item's text, fetching it if its row slot holds another item"""
+        row = self._rows[index % len(self._rows)]
+        if row[0] != index:
+            row[0] = index
+            try:
+                row[1] = str(self.get_item(index))
+            except Exception as e:
+                logging.error(f"Error getting list item {index}: {e}")
+                row[1] = ""
+        return row[1]
+    
+    def draw_component(self, canvas: ImageDraw.ImageDraw):
+        """Draw the rows in view"""
+        rect = self.get_absolute_rect()
+        size = (rect.width + 1, rect.height + 1)
+        if self._buffer is None or self._buffer.size != size or type(self._buffer_canvas) is not type(canvas):
+            self._buffer, self._buffer_canvas = new_surface(canvas, size, "BLACK")
+            self._drawn_offset = None
+        
+        bg_color = resolve_color(self.bg_color) if self.bg_color else self._backdrop_color()
+        row_color = resolve_color(self.row_color or self.theme_manager.get_color("menu_bg"))
+        text_color = resolve_color(self.text_color or self.theme_manager.get_color("menu_item"))
+        selected_bg_color = resolve_color(self.selected_bg_color or self.theme_manager.get_color("menu_selected_bg"))
+        selected_text_color = resolve_color(self.selected_text_color or self.theme_manager.get_color("menu_selected_text"))
+        
+        draw = self._buffer_canvas
+        draw.rectangle((0, 0, size[0], size[1]), fill=bg_color)
+        
+        atlas = fonts.get_atlas(self.font)
+        first = self.scroll_offset // self.row_pitch
+        last = min(self.item_count, (self.scroll_offset + rect.height) // self.row_pitch + 1)
+        for index in range(first, last):
+            y = index * self.row_pitch - self.scroll_offset
+            selected = index == self.selected
+            draw.rectangle((0, y, rect.width, y + self.row_height),
+                           fill=selected_bg_color if selected else row_color)
+            
+            text = self._row_text(index)
+            if self.align == "center":
+                x = (rect.width - atlas.get_length(text)) // 2
+            else:
+                x = 5
+            fonts.draw_text(draw, (x, y + (self.row_height - self.font.size) // 2), text,
+                            self.font, selected_text_color if selected else text_color)
+        
+        # ImageDraw keeps the image it draws on
+        canvas._image.paste(self._buffer, (rect.x, rect.y))
+        
+        # Let the display move the rows it already has
+        if self._drawn_offset is not None and self._drawn_offset != self.scroll_offset:
+            self.report_scroll((rect.x, rect.y, rect.x + size[0], rect.y + size[1]),
+                               self.scroll_offset - self._drawn_offset)
+        self._drawn_offset = self.scroll_offset
+    
+    def on_event(self, event: Event) -> bool:
+        """Move or use the selection"""
+        if event.event_type != EventTypes.BUTTON_PRESS or not self.item_count:
+            return False
+        
+        button = event.data.get("button")
+        if button == "up":
+            self.select((self.selected - 1) % self.item_count)
+            return True
+        elif button == "down":
+            self.select((self.selected + 1) % self.item_count)
+            return True
+        elif button == "press" and self.on_select:
+            self.on_select(self.selected)
+            return True
+        return False
+
+# Marks an observer that has not seen any value yet
+_UNSET = object()
+
 class Screen(Container):
     """Base class for full application screens"""
     
@@ -393,14 +1296,172 @@ class Screen(Container):
         bg_color = get_theme_manager().get_color("background")
         super().__init__(rect, bg_color)
         self.name = "screen"
+        
+        # Areas to repaint that no longer belong to a component
+        self.damage: List[Box] = []
+        
+        # Areas whose contents moved up by a number of rows in the last
+        # render, for the app to pass on to the display
+        self.scrolled: List[Tuple[Box, int]] = []
+        
+        # Set while the screen is shown and receiving input
+        self.active = False
+        
+        # Screen level input handlers by event type, called when no
+        # component in the tree handled the event
+        self.input_handlers: Dict[str, Callable[[Event], None]] = {}
+        
+        # State observers as [observable, callback, value when paused];
+        # they are only attached while the screen is active
+        self._observers: List[list] = []
+    
+    def add_input_handler(self, event_type: str, callback: Callable[[Event], None]):
+        """Handle an input event type while the screen is active"""
+        self.input_handlers[event_type] = callback
+    
+    def on_event(self, event: Event) -> bool:
+        """Pass input no component took to the screen's handler"""
+        handler = self.input_handlers.get(event.event_type)
+        if handler:
+            handler(event)
+            return True
+        return False
+    
+    def observe(self, observable, callback: Callable[[Any], None]):
+        """Observe a state value while the screen is active
+        
+        Changes made while the screen is hidden are not delivered; on
+        activation the callback gets the latest value once if it changed.
+        """
+        self._observers.append([observable, callback, _UNSET])
+        if self.active:
+            self._resume_observer(self._observers[-1])
+    
+    def _resume_observer(self, entry: list):
+        """Attach an observer and catch it up with the current value"""
+        observable, callback, paused_value = entry
+        observable.observe(callback)
+        if observable.value != paused_value:
+            try:
+                callback(observable.value)
+            except Exception as e:
+                logging.error(f"Error in observer: {e}")
+    
+    def _pause_observers(self):
+        """Detach observers, remembering the values they last saw"""
+        for entry in self._observers:
+            entry[0].unobserve(entry[1])
+            entry[2] = entry[0].value
+    
+    def destroy(self):
+        """Release observers and input focus so the screen can be freed"""
+        if self.active:
+            self.deactivate()
+        self._observers = []
+    
+    def render(self, canvas: ImageDraw.ImageDraw, full: bool = False) -> Optional[List[Box]]:
+        """Repaint whatever changed since the last render
+        
+        Returns None after a full repaint, otherwise the list of boxes that
+        were repainted (empty if nothing changed).
+        """
+        if full or self._dirty or self._drawn_box is None:
+            self.draw(canvas)
+            self.damage = []
+            self.scrolled = []
+            return None
+        
+        if not self._dirty_children and not self.damage:
+            return []
+        
+        regions = self.damage
+        self.damage = []
+        
+        # Collect damage from dirty subtrees and every visible component in
+        # paint order with the area it will paint
+        components = []
+        self._collect_damage(self, regions, components)
+        
+        # A component touching the damage is repainted whole, so anything
+        # painted above it in the same area has to be repainted as well
+        repaint = [False] * len(components)
+        changed = True
+        while changed:
+            changed = False
+            for i, (component, box) in enumerate(components):
+                if not repaint[i] and any(boxes_intersect(box, region) for region in regions):
+                    repaint[i] = True
+                    regions.append(box)
+                    changed = True
+        
+        # Repaint the background, then the components in z-order
+        for region in regions:
+            canvas.rectangle((region[0], region[1], region[2] - 1, region[3] - 1), fill=resolve_color(self.bg_color))
+        for i, (component, box) in enumerate(components):
+            if repaint[i]:
+                component._drawn_box = component.paint(canvas) or box
+        
+        self._clear_dirty(self)
+        return regions
+    
+    def _collect_damage(self, node: UIComponent, regions: List[Box], components: list):
+        """Walk the tree gathering damaged areas and visible components"""
+        for child in node.children:
+            if child._dirty:
+                # The old and new areas of the whole subtree need repainting
+                regions.extend(self._drawn_boxes(child))
+                if child.visible:
+                    regions.extend(self._paint_boxes(child))
+                else:
+                    child._drawn_box = None
+                    child._mark_hidden()
+            
+            if not child.visible:
+                continue
+            
+            box = child.get_paint_box()
+            if box:
+                components.append((child, box))
+            self._collect_damage(child, regions, components)
+    
+    def _drawn_boxes(self, node: UIComponent) -> List[Box]:
+        """Areas a subtree was last drawn at"""
+        boxes = [node._drawn_box] if node._drawn_box else []
+        for child in node.children:
+            boxes.extend(self._drawn_boxes(child))
+        return boxes
+    
+    def _paint_boxes(self, node: UIComponent) -> List[Box]:
+        """Areas the visible part of a subtree will be drawn at"""
+        if not node.visible:
+            return []
+        box = node.get_paint_box()
+        boxes = [box] if box else []
+        for child in node.children:
+            boxes.extend(self._paint_boxes(child))
+        return boxes
+    
+    def _clear_dirty(self, node: UIComponent):
+        """Reset dirty flags after a render"""
+        node._dirty = False
+        if node._dirty_children:
+            node._dirty_children = False
+            for child in node.children:
+                if child._dirty or child._dirty_children:
+                    self._clear_dirty(child)
     
     def activate(self):
-        """Called when the screen becomes active"""
-        pass
+        """Called when the screen becomes active (call from subclasses)"""
+        self.active = True
+        get_input_router().focus(self)
+        for entry in self._observers:
+            self._resume_observer(entry)
     
     def deactivate(self):
-        """Called when the screen is no longer active"""
-        pass
+        """Called when the screen is no longer active (call from subclasses)"""
+        self.active = False
+        get_input_router().blur(self)
+        self._pause_observers()
     
     def update(self):
         """Update screen state - called periodically"""